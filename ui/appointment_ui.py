@@ -571,8 +571,7 @@ class AppointmentUI:
     def edit_appointment(self, appointment_id):
         """Load appointment data for editing"""
         try:
-            appointments = self.appointment_manager.get_all_appointments()
-            appointment = next((a for a in appointments if a.get('id') == appointment_id), None)
+            appointment = self.appointment_manager.get_appointment_by_id(appointment_id)
             
             if appointment:
                 self.current_appointment_id = appointment_id
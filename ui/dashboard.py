@@ -15,7 +15,6 @@ from ui.doctor_ui import DoctorUI
 from ui.opd_ui import OPDUI
 from ui.patient_details import PatientDetails
 from utils.file_io import PatientManager, AppointmentManager, DoctorManager, OPDManager
-from utils.pdf_generator import PDFGenerator
 
 class HospitalDashboard:
     def __init__(self, root):
@@ -30,7 +29,8 @@ class HospitalDashboard:
         self.appointment_manager = AppointmentManager()
         self.doctor_manager = DoctorManager()
         self.opd_manager = OPDManager()
-        self.pdf_generator = PDFGenerator()
+        # Created on the first report, so startup doesn't load ReportLab
+        self.pdf_generator = None
     
     def setup_styles(self):
         """Configure modern UI styles"""
@@ -404,13 +404,20 @@ class HospitalDashboard:
                   command=reports_window.destroy,
                   width=30).pack(pady=20)
     
+    def get_pdf_generator(self):
+        """PDF generator, created the first time a report is requested"""
+        if self.pdf_generator is None:
+            from utils.pdf_generator import PDFGenerator
+            self.pdf_generator = PDFGenerator()
+        return self.pdf_generator
+    
     def generate_appointments_report(self, date=None):
         """Generate appointments report"""
         try:
             if date is None:
-                filepath = self.pdf_generator.generate_appointment_list()
+                filepath = self.get_pdf_generator().generate_appointment_list()
             else:
-                filepath = self.pdf_generator.generate_appointment_list(date)
+                filepath = self.get_pdf_generator().generate_appointment_list(date)
             messagebox.showinfo("Success", f"Appointments report generated: {os.path.basename(filepath)}")
         except Exception as e:
             messagebox.showerror("Error", f"Error generating report: {str(e)}")
@@ -419,9 +426,9 @@ class HospitalDashboard:
         """Generate OPD report"""
         try:
             if date is None:
-                filepath = self.pdf_generator.generate_opd_report()
+                filepath = self.get_pdf_generator().generate_opd_report()
             else:
-                filepath = self.pdf_generator.generate_opd_report(date)
+                filepath = self.get_pdf_generator().generate_opd_report(date)
             messagebox.showinfo("Success", f"OPD report generated: {os.path.basename(filepath)}")
         except Exception as e:
             messagebox.showerror("Error", f"Error generating report: {str(e)}")
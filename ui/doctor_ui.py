@@ -481,8 +481,7 @@ class DoctorUI:
     def edit_doctor(self, doctor_id):
         """Load doctor data for editing"""
         try:
-            doctors = self.doctor_manager.get_all_doctors()
-            doctor = next((d for d in doctors if d.get('id') == doctor_id), None)
+            doctor = self.doctor_manager.get_doctor_by_id(doctor_id)
             
             if doctor:
                 self.current_doctor_id = doctor_id
@@ -548,8 +547,7 @@ class DoctorUI:
         doctor_id = item['values'][0]
         
         try:
-            doctors = self.doctor_manager.get_all_doctors()
-            doctor = next((d for d in doctors if d.get('id') == doctor_id), None)
+            doctor = self.doctor_manager.get_doctor_by_id(doctor_id)
             
             if doctor:
                 self.show_doctor_details_window(doctor)
@@ -656,8 +654,7 @@ class DoctorUI:
         
         try:
             doctor_id = doctor_selection.split(" - ")[0]
-            doctors = self.doctor_manager.get_all_doctors()
-            doctor = next((d for d in doctors if d.get('id') == doctor_id), None)
+            doctor = self.doctor_manager.get_doctor_by_id(doctor_id)
             
             if doctor and 'schedule' in doctor:
                 schedule = doctor['schedule']
@@ -6,10 +6,71 @@ Handles patient check-ins, visits, queue management, and OPD operations
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, date
+from collections import ChainMap
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 import re
 
 from utils.file_io import OPDManager, PatientManager, DoctorManager
 
+# Notebook tab indices
+CHECKIN_TAB, VISIT_FORM_TAB, VISIT_LIST_TAB, QUEUE_TAB = range(4)
+
+# Delay before a visit search runs, so a burst of keystrokes triggers one search
+_SEARCH_DELAY_MS = 150
+
+# Delay before deferred visit changes are written, so rapid deletes share one write
+_FLUSH_DELAY_MS = 500
+
+# How often a pending background read or write is checked for completion
+_IO_POLL_MS = 30
+
+# Rows shown per page of the visit list
+_VISIT_PAGE_SIZE = 200
+
+# Patient fields shown in the check-in list, in column order
+_CHECKIN_FIELDS = ("id", "name", "age", "phone", "registration_date")
+_CHECKIN_DEFAULTS = dict.fromkeys(_CHECKIN_FIELDS, "")
+_get_checkin_row = itemgetter(*_CHECKIN_FIELDS)
+
+def _visit_row(visit):
+    """Return visit list values for a visit"""
+    # Only look up the id fallbacks when a name is missing
+    patient_name = visit.get("patient_name")
+    if patient_name is None:
+        patient_name = visit.get("patient_id", "")
+    doctor_name = visit.get("doctor_name")
+    if doctor_name is None:
+        doctor_name = visit.get("doctor_id", "")
+    return (
+        visit.get("id", ""),
+        patient_name,
+        doctor_name,
+        visit.get("visit_date", ""),
+        visit.get("visit_time", ""),
+        visit.get("visit_type", ""),
+        visit.get("priority", ""),
+        visit.get("status", "")
+    )
+
+@contextmanager
+def _bulk_update(tree):
+    """Hide a tree's columns while rows are inserted so layout is done once"""
+    display_columns = tree["displaycolumns"]
+    tree.configure(displaycolumns=())
+    try:
+        yield
+    finally:
+        tree.configure(displaycolumns=display_columns)
+
+def _checkin_row(patient):
+    """Return check-in list values for a patient, blank for missing fields"""
+    try:
+        return _get_checkin_row(patient)
+    except KeyError:
+        return _get_checkin_row(ChainMap(patient, _CHECKIN_DEFAULTS))
+
 class OPDUI:
     def __init__(self, parent):
         self.parent = parent
@@ -17,24 +78,44 @@ class OPDUI:
         self.patient_manager = PatientManager()
         self.doctor_manager = DoctorManager()
         self.current_visit_id = None
+        self._visit_iids = []
+        self._visible_visit_iids = set()
+        self._visit_iid_by_status = {}
+        self._visit_iid_by_id = {}
+        self._visit_rows = {}
+        self._visit_source = []
+        self._visit_page = 0
+        self._row_cache = {}
+        self._row_cache_version = None
+        self._visits_snapshot = None
+        self._search_after_id = None
+        self._flush_after_id = None
+        self._visits_load_token = 0
+        self._pending_io = 0
+        # Single worker keeps file reads and writes in submission order
+        self._io_executor = ThreadPoolExecutor(max_workers=1)
         
         self.create_window()
         self.setup_ui()
-        self.load_visits()
+        self._visit_context_menu = self.create_visit_context_menu()
+        
+        # Warm the visit cache while the user looks at the first tab
+        self._io_executor.submit(self._prefetch_visits)
     
     def create_window(self):
         """Create OPD management window"""
         self.window = tk.Toplevel(self.parent)
         self.window.title("OPD Management")
-        self.window.geometry("1200x800")
         self.window.transient(self.parent)
         self.window.grab_set()
-        
-        # Center the window
-        self.window.update_idletasks()
-        x = (self.window.winfo_screenwidth() // 2) - (self.window.winfo_width() // 2)
-        y = (self.window.winfo_screenheight() // 2) - (self.window.winfo_height() // 2)
-        self.window.geometry(f'+{x}+{y}')
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
+        # The window can also be destroyed with the whole app, bypassing on_close
+        self.window.bind("<Destroy>", self._on_destroy)
+        
+        # Center the window using the known size, no layout pass needed
+        x = (self.window.winfo_screenwidth() - 1200) // 2
+        y = (self.window.winfo_screenheight() - 800) // 2
+        self.window.geometry(f'1200x800+{x}+{y}')
     
     def setup_ui(self):
         """Setup the user interface"""
@@ -46,26 +127,128 @@ class OPDUI:
         ttk.Label(main_frame, text="OPD Management", font=('Arial', 16, 'bold')).pack(pady=(0, 20))
         
         # Create notebook for tabs
-        notebook = ttk.Notebook(main_frame)
-        notebook.pack(fill=tk.BOTH, expand=True)
-        
-        # Quick check-in tab
-        self.create_checkin_tab(notebook)
+        self.notebook = ttk.Notebook(main_frame)
+        self.notebook.pack(fill=tk.BOTH, expand=True)
+        
+        # Tabs start as empty frames and are built the first time they are shown
+        self._tabs = []
+        self._initialized_tabs = set()
+        for title, builder in (("Quick Check-in", self.create_checkin_tab),
+                               ("Visit Details", self.create_visit_form_tab),
+                               ("Visit List", self.create_visit_list_tab),
+                               ("Queue Management", self.create_queue_tab)):
+            frame = ttk.Frame(self.notebook)
+            self.notebook.add(frame, text=title)
+            self._tabs.append((frame, builder))
+        
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+        self._ensure_tab(CHECKIN_TAB)
+    
+    def _on_tab_changed(self, event=None):
+        """Build the selected tab on first use"""
+        self._ensure_tab(self.notebook.index("current"))
+    
+    def _ensure_tab(self, index):
+        """Build a tab's contents if it has not been built yet"""
+        if index in self._initialized_tabs:
+            return
+        self._initialized_tabs.add(index)
+        frame, builder = self._tabs[index]
+        builder(frame)
+    
+    def _cached_visits(self):
+        """All visits, fetched from the manager at most once per event loop tick"""
+        if self._visits_snapshot is None:
+            self._visits_snapshot = self.opd_manager.get_all_visits()
+            self.window.after_idle(self._clear_visits_snapshot)
+        return self._visits_snapshot
+    
+    def _clear_visits_snapshot(self):
+        """Forget the visits fetched during the last event"""
+        self._visits_snapshot = None
+    
+    def _prefetch_visits(self):
+        """Load visits and build the date and status indexes used by today's views"""
+        # The indexes cover every date, so adjacent days are warmed as well
+        today = datetime.now().strftime("%Y-%m-%d")
+        self.opd_manager.get_visits_by_date(today)
+        self.opd_manager.get_visits_by_status('Waiting', today)
+    
+    def _schedule_flush(self):
+        """Write deferred visit changes shortly, coalescing further changes"""
+        if self._flush_after_id is None:
+            self._flush_after_id = self.window.after(_FLUSH_DELAY_MS, self._flush_if_dirty)
+    
+    def _flush_if_dirty(self):
+        """Write deferred visit changes to disk in the background"""
+        self._flush_after_id = None
+        self._run_io(self.opd_manager.flush, self._on_flush_done, "Error saving visit changes")
+    
+    def _on_flush_done(self, saved):
+        """Report a failed background write"""
+        if not saved:
+            messagebox.showerror("Error", "Failed to save visit changes!")
+    
+    def _run_io(self, func, on_done, error_message):
+        """Run func on the I/O thread and pass its result to on_done on the Tk thread"""
+        future = self._io_executor.submit(func)
+        self._pending_io += 1
+        self.window.config(cursor="watch")
+        self.window.after(_IO_POLL_MS, self._check_io, future, on_done, error_message)
+    
+    def _check_io(self, future, on_done, error_message):
+        """Poll a background task and hand its result back once finished"""
+        if not future.done():
+            self.window.after(_IO_POLL_MS, self._check_io, future, on_done, error_message)
+            return
         
-        # Visit form tab
-        self.create_visit_form_tab(notebook)
+        if not self.window.winfo_exists():
+            return
         
-        # Visit list tab
-        self.create_visit_list_tab(notebook)
+        self._pending_io -= 1
+        if not self._pending_io:
+            self.window.config(cursor="")
         
-        # Queue management tab
-        self.create_queue_tab(notebook)
+        try:
+            result = future.result()
+        except Exception as e:
+            messagebox.showerror("Error", f"{error_message}: {str(e)}")
+            return
+        on_done(result)
+    
+    def on_close(self):
+        """Write pending changes and close the window"""
+        if self._flush_after_id is not None:
+            self.window.after_cancel(self._flush_after_id)
+            self._flush_after_id = None
+        self._io_executor.shutdown(wait=True)
+        if not self.opd_manager.flush():
+            messagebox.showerror("Error", "Failed to save visit changes!")
+        self.window.destroy()
+    
+    def _on_destroy(self, event):
+        """Write deferred visit changes when the window goes away by any route"""
+        # Child widgets' <Destroy> events also reach this binding
+        if event.widget is not self.window:
+            return
+        if self._flush_after_id is not None:
+            self.window.after_cancel(self._flush_after_id)
+            self._flush_after_id = None
+        self._io_executor.shutdown(wait=True)
+        # The UI is being torn down, so a dialog can't be shown here
+        if not self.opd_manager.flush():
+            print("Error saving visit changes while closing OPD Management")
     
-    def create_checkin_tab(self, notebook):
+    def _refresh_visit_views(self):
+        """Reload the visit list and queue if their tabs have been built"""
+        self._clear_visits_snapshot()
+        if VISIT_LIST_TAB in self._initialized_tabs:
+            self.load_visits()
+        if QUEUE_TAB in self._initialized_tabs:
+            self.refresh_queue()
+    
+    def create_checkin_tab(self, checkin_frame):
         """Create quick check-in tab"""
-        checkin_frame = ttk.Frame(notebook)
-        notebook.add(checkin_frame, text="Quick Check-in")
-        
         # Check-in container
         checkin_container = ttk.LabelFrame(checkin_frame, text="Patient Check-in", padding=20)
         checkin_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
@@ -143,11 +326,8 @@ class OPDUI:
         # Load all patients initially
         self.load_patients_for_checkin()
     
-    def create_visit_form_tab(self, notebook):
+    def create_visit_form_tab(self, form_frame):
         """Create detailed visit form tab"""
-        form_frame = ttk.Frame(notebook)
-        notebook.add(form_frame, text="Visit Details")
-        
         # Form container
         form_container = ttk.LabelFrame(form_frame, text="OPD Visit Information", padding=20)
         form_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
@@ -242,6 +422,18 @@ class OPDUI:
         self.visit_notes_text.grid(row=row, column=1, sticky=tk.W, pady=5, columnspan=2)
         row += 1
         
+        # Keep a snapshot of each text area so form reads don't copy from Tk
+        self._text_cache = {}
+        self._visit_text_widgets = {
+            "chief_complaint": self.chief_complaint_text,
+            "diagnosis": self.diagnosis_text,
+            "treatment": self.treatment_text,
+            "prescription": self.prescription_text,
+            "notes": self.visit_notes_text
+        }
+        for key, widget in self._visit_text_widgets.items():
+            widget.bind("<<Modified>>", lambda e, w=widget, k=key: self._on_visit_text_modified(w, k))
+        
         # Form buttons
         form_buttons_frame = ttk.Frame(form_container)
         form_buttons_frame.grid(row=row, column=0, columnspan=3, pady=20)
@@ -256,11 +448,8 @@ class OPDUI:
         # Load combo data
         self.load_visit_combo_data()
     
-    def create_visit_list_tab(self, notebook):
+    def create_visit_list_tab(self, list_frame):
         """Create visit list tab"""
-        list_frame = ttk.Frame(notebook)
-        notebook.add(list_frame, text="Visit List")
-        
         # Filter frame
         filter_frame = ttk.Frame(list_frame)
         filter_frame.pack(fill=tk.X, padx=20, pady=10)
@@ -335,12 +524,22 @@ class OPDUI:
                   command=self.delete_visit).pack(side=tk.LEFT, padx=5)
         ttk.Button(action_frame, text="Refresh", 
                   command=self.load_visits).pack(side=tk.LEFT, padx=5)
+        
+        # Page controls
+        self.visit_next_button = ttk.Button(action_frame, text="Next >", 
+                                          command=lambda: self.change_visit_page(1))
+        self.visit_next_button.pack(side=tk.RIGHT, padx=5)
+        self.visit_page_var = tk.StringVar()
+        ttk.Label(action_frame, textvariable=self.visit_page_var).pack(side=tk.RIGHT, padx=5)
+        self.visit_prev_button = ttk.Button(action_frame, text="< Prev", 
+                                          command=lambda: self.change_visit_page(-1))
+        self.visit_prev_button.pack(side=tk.RIGHT, padx=5)
+        
+        # Load visits initially
+        self.load_visits()
     
-    def create_queue_tab(self, notebook):
+    def create_queue_tab(self, queue_frame):
         """Create queue management tab"""
-        queue_frame = ttk.Frame(notebook)
-        notebook.add(queue_frame, text="Queue Management")
-        
         # Queue stats
         stats_frame = ttk.LabelFrame(queue_frame, text="Queue Statistics", padding=10)
         stats_frame.pack(fill=tk.X, padx=20, pady=10)
@@ -420,20 +619,17 @@ class OPDUI:
         """Load patients for check-in"""
         try:
             # Clear existing items
-            for item in self.checkin_patient_tree.get_children():
-                self.checkin_patient_tree.delete(item)
+            children = self.checkin_patient_tree.get_children()
+            if children:
+                self.checkin_patient_tree.delete(*children)
             
             # Load patients
             patients = self.patient_manager.get_all_patients()
             
-            for patient in patients:
-                self.checkin_patient_tree.insert("", tk.END, values=(
-                    patient.get("id", ""),
-                    patient.get("name", ""),
-                    patient.get("age", ""),
-                    patient.get("phone", ""),
-                    patient.get("registration_date", "")
-                ))
+            insert = self.checkin_patient_tree.insert
+            with _bulk_update(self.checkin_patient_tree):
+                for patient in patients:
+                    insert("", "end", values=_checkin_row(patient))
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error loading patients: {str(e)}")
@@ -448,8 +644,9 @@ class OPDUI:
         
         try:
             # Clear existing items
-            for item in self.checkin_patient_tree.get_children():
-                self.checkin_patient_tree.delete(item)
+            children = self.checkin_patient_tree.get_children()
+            if children:
+                self.checkin_patient_tree.delete(*children)
             
             # Search patients
             if search_query:
@@ -458,14 +655,10 @@ class OPDUI:
                 patients = self.patient_manager.get_all_patients()
             
             # Populate tree
-            for patient in patients:
-                self.checkin_patient_tree.insert("", tk.END, values=(
-                    patient.get("id", ""),
-                    patient.get("name", ""),
-                    patient.get("age", ""),
-                    patient.get("phone", ""),
-                    patient.get("registration_date", "")
-                ))
+            insert = self.checkin_patient_tree.insert
+            with _bulk_update(self.checkin_patient_tree):
+                for patient in patients:
+                    insert("", "end", values=_checkin_row(patient))
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error searching patients: {str(e)}")
@@ -486,8 +679,9 @@ class OPDUI:
         self.quick_priority_var.set("Normal")
         
         # Clear tree selection
-        for item in self.checkin_patient_tree.selection():
-            self.checkin_patient_tree.selection_remove(item)
+        selection = self.checkin_patient_tree.selection()
+        if selection:
+            self.checkin_patient_tree.selection_remove(*selection)
     
     def quick_checkin(self):
         """Perform quick check-in"""
@@ -515,8 +709,7 @@ class OPDUI:
             if self.opd_manager.add_visit(visit_data):
                 messagebox.showinfo("Success", "Patient checked in successfully!")
                 self.clear_checkin_selection()
-                self.load_visits()
-                self.refresh_queue()
+                self._refresh_visit_views()
             else:
                 messagebox.showerror("Error", "Failed to check in patient!")
                 
@@ -546,7 +739,7 @@ class OPDUI:
             messagebox.showerror("Validation Error", "Patient is required!")
             return False
         
-        chief_complaint = self.chief_complaint_text.get("1.0", tk.END).strip()
+        chief_complaint = self._text_cache.get("chief_complaint", "")
         if not chief_complaint:
             messagebox.showerror("Validation Error", "Chief complaint is required!")
             return False
@@ -599,27 +792,30 @@ class OPDUI:
             data["doctor_name"] = doctor_selection.split(" - ")[1]
         
         # Get text areas
-        data["chief_complaint"] = self.chief_complaint_text.get("1.0", tk.END).strip()
-        data["diagnosis"] = self.diagnosis_text.get("1.0", tk.END).strip()
-        data["treatment"] = self.treatment_text.get("1.0", tk.END).strip()
-        data["prescription"] = self.prescription_text.get("1.0", tk.END).strip()
-        data["notes"] = self.visit_notes_text.get("1.0", tk.END).strip()
+        for key in self._visit_text_widgets:
+            data[key] = self._text_cache.get(key, "")
         
         return data
     
+    def _on_visit_text_modified(self, widget, key):
+        """Snapshot a visit text area whenever its contents change"""
+        if widget.edit_modified():
+            self._text_cache[key] = widget.get("1.0", "end-1c").strip()
+            widget.edit_modified(False)
+    
     def clear_visit_form(self):
         """Clear visit form"""
+        self.current_visit_id = None
+        if VISIT_FORM_TAB not in self._initialized_tabs:
+            return
+        
         for var in self.visit_form_vars.values():
             var.set("")
         
         # Clear text areas
-        self.chief_complaint_text.delete("1.0", tk.END)
-        self.diagnosis_text.delete("1.0", tk.END)
-        self.treatment_text.delete("1.0", tk.END)
-        self.prescription_text.delete("1.0", tk.END)
-        self.visit_notes_text.delete("1.0", tk.END)
-        
-        self.current_visit_id = None
+        for widget in self._visit_text_widgets.values():
+            widget.delete("1.0", tk.END)
+        self._text_cache.clear()
     
     def save_visit(self):
         """Save new visit"""
@@ -632,8 +828,7 @@ class OPDUI:
             if self.opd_manager.add_visit(visit_data):
                 messagebox.showinfo("Success", "Visit saved successfully!")
                 self.clear_visit_form()
-                self.load_visits()
-                self.refresh_queue()
+                self._refresh_visit_views()
             else:
                 messagebox.showerror("Error", "Failed to save visit!")
                 
@@ -655,8 +850,7 @@ class OPDUI:
             if self.opd_manager.update_visit(self.current_visit_id, visit_data):
                 messagebox.showinfo("Success", "Visit updated successfully!")
                 self.clear_visit_form()
-                self.load_visits()
-                self.refresh_queue()
+                self._refresh_visit_views()
             else:
                 messagebox.showerror("Error", "Failed to update visit!")
                 
@@ -664,69 +858,207 @@ class OPDUI:
             messagebox.showerror("Error", f"Error updating visit: {str(e)}")
     
     def load_visits(self):
-        """Load visits into list"""
+        """Load visits into list, reading the file off the Tk thread"""
+        self._visits_load_token += 1
+        token = self._visits_load_token
+        self._run_io(self.opd_manager.get_all_visits,
+                     lambda visits: self._on_visits_loaded(visits, token), "Error loading visits")
+    
+    def _on_visits_loaded(self, visits, token):
+        """Show visits read by load_visits"""
+        # A newer load has been requested since this one started
+        if token != self._visits_load_token:
+            return
+        
         try:
-            # Clear existing items
-            for item in self.visit_tree.get_children():
-                self.visit_tree.delete(item)
-            
-            # Load visits
-            visits = self.opd_manager.get_all_visits()
-            
-            for visit in visits:
-                self.visit_tree.insert("", tk.END, values=(
-                    visit.get("id", ""),
-                    visit.get("patient_name", visit.get("patient_id", "")),
-                    visit.get("doctor_name", visit.get("doctor_id", "")),
-                    visit.get("visit_date", ""),
-                    visit.get("visit_time", ""),
-                    visit.get("visit_type", ""),
-                    visit.get("priority", ""),
-                    visit.get("status", "")
-                ))
+            self._show_visits(visits, rebuild=True)
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error loading visits: {str(e)}")
     
+    def _rows_for_visits(self, visits):
+        """Visit list values for visits, reused until the manager's visits change"""
+        if self._row_cache_version != self.opd_manager.cache_version:
+            self._row_cache = {}
+            self._row_cache_version = self.opd_manager.cache_version
+        
+        cache = self._row_cache
+        rows = []
+        for visit in visits:
+            row = cache.get(id(visit))
+            if row is None:
+                row = cache[id(visit)] = _visit_row(visit)
+            rows.append(row)
+        return rows
+    
+    def _show_visits(self, visits, rebuild=False):
+        """Show visits in the list from the first page"""
+        self._visit_source = visits
+        self._visit_page = 0
+        self._show_visit_page(rebuild)
+    
+    def _show_visit_page(self, rebuild=False):
+        """Show the current page of the visit list"""
+        page_count = max(1, -(-len(self._visit_source) // _VISIT_PAGE_SIZE))
+        self._visit_page = min(self._visit_page, page_count - 1)
+        start = self._visit_page * _VISIT_PAGE_SIZE
+        page = self._visit_source[start:start + _VISIT_PAGE_SIZE]
+        
+        if rebuild:
+            self._populate_visit_tree(page)
+        else:
+            self._sync_visit_tree(page)
+        
+        self.visit_page_var.set(f"Page {self._visit_page + 1} of {page_count}")
+        self.visit_prev_button.state(["!disabled" if self._visit_page > 0 else "disabled"])
+        self.visit_next_button.state(["!disabled" if self._visit_page < page_count - 1 else "disabled"])
+    
+    def change_visit_page(self, step):
+        """Move the visit list forward or back by step pages"""
+        self._visit_page = max(0, self._visit_page + step)
+        try:
+            self._show_visit_page()
+        except Exception as e:
+            messagebox.showerror("Error", f"Error loading visits: {str(e)}")
+    
+    def _populate_visit_tree(self, visits):
+        """Replace visit list rows and index them by id and status"""
+        # Detached rows are not returned by get_children, so clear by iid
+        if self._visit_iids:
+            self.visit_tree.delete(*self._visit_iids)
+        
+        self._visit_iids = []
+        self._visit_iid_by_status = {}
+        self._visit_iid_by_id = {}
+        self._visit_rows = {}
+        
+        # Bind hot-loop lookups once
+        insert = self.visit_tree.insert
+        append_iid = self._visit_iids.append
+        by_status = self._visit_iid_by_status
+        by_id = self._visit_iid_by_id
+        rows = self._visit_rows
+        
+        with _bulk_update(self.visit_tree):
+            for row in self._rows_for_visits(visits):
+                iid = insert("", "end", values=row)
+                append_iid(iid)
+                by_status.setdefault(row[7], set()).add(iid)
+                # Imported data can repeat a visit ID, so keep every row's iid
+                by_id.setdefault(row[0], []).append(iid)
+                rows[iid] = row
+        
+        self._visible_visit_iids = set(self._visit_iids)
+    
+    def _sync_visit_tree(self, visits):
+        """Update visit list rows to match visits, touching only rows that changed"""
+        tree = self.visit_tree
+        by_status = self._visit_iid_by_status
+        rows = self._visit_rows
+        visible = self._visible_visit_iids
+        
+        # Pair each wanted row with an existing row for the same visit ID, in order,
+        # so visits whose ID repeats keep one row each
+        unmatched = {visit_id: list(iids) for visit_id, iids in self._visit_iid_by_id.items()}
+        wanted = []
+        for row in self._rows_for_visits(visits):
+            iids = unmatched.get(row[0])
+            wanted.append((row, iids.pop(0) if iids else None))
+        
+        # Remove rows that no longer match
+        stale = [iid for iids in unmatched.values() for iid in iids]
+        if stale:
+            tree.delete(*stale)
+            for iid in stale:
+                old_row = rows.pop(iid)
+                by_status[old_row[7]].discard(iid)
+                visible.discard(iid)
+        
+        # Insert new rows in place and update rows whose values changed
+        visit_iids = []
+        by_id = {}
+        index = 0
+        with _bulk_update(tree):
+            for row, iid in wanted:
+                if iid is None:
+                    iid = tree.insert("", index, values=row)
+                    by_status.setdefault(row[7], set()).add(iid)
+                    visible.add(iid)
+                elif rows[iid] != row:
+                    tree.item(iid, values=row)
+                    old_status = rows[iid][7]
+                    if old_status != row[7]:
+                        by_status[old_status].discard(iid)
+                        by_status.setdefault(row[7], set()).add(iid)
+                rows[iid] = row
+                visit_iids.append(iid)
+                by_id.setdefault(row[0], []).append(iid)
+                if iid in visible:
+                    index += 1
+        
+        self._visit_iids = visit_iids
+        self._visit_iid_by_id = by_id
+    
+    def _apply_visit_status_filter(self, status_filter=None):
+        """Show only rows matching the status filter without rebuilding the tree"""
+        if status_filter is None:
+            status_filter = self.visit_status_filter_var.get()
+        if status_filter == "All":
+            wanted = set(self._visit_iids)
+        else:
+            wanted = set(self._visit_iid_by_status.get(status_filter, ()))
+        
+        hidden = [iid for iid in self._visible_visit_iids if iid not in wanted]
+        if hidden:
+            self.visit_tree.detach(*hidden)
+        
+        # Reattach newly visible rows at their original position
+        index = 0
+        for iid in self._visit_iids:
+            if iid in wanted:
+                if iid not in self._visible_visit_iids:
+                    self.visit_tree.reattach(iid, "", index)
+                index += 1
+        
+        self._visible_visit_iids = wanted
+    
     def on_visit_search(self, *args):
-        """Handle visit search"""
-        search_query = self.visit_search_var.get().strip().lower()
+        """Handle visit search, waiting for typing to pause"""
+        if self._search_after_id:
+            self.window.after_cancel(self._search_after_id)
+        self._search_after_id = self.window.after(_SEARCH_DELAY_MS, self._do_visit_search)
+    
+    def _do_visit_search(self):
+        """Run the visit search for the current query"""
+        self._search_after_id = None
+        search_query = self.visit_search_var.get().strip().casefold()
+        status_filter = self.visit_status_filter_var.get()
         
         try:
-            # Clear existing items
-            for item in self.visit_tree.get_children():
-                self.visit_tree.delete(item)
+            # Search in patient name, doctor name, or visit ID, filtering by status
+            # before paging so every page is full
+            status = None if status_filter == "All" else status_filter
+            if search_query or status:
+                matches = self.opd_manager.search_visits(search_query, status)
+            else:
+                matches = self._cached_visits()
             
-            # Load and filter visits
-            visits = self.opd_manager.get_all_visits()
+            self._show_visits(matches)
             
-            for visit in visits:
-                # Search in patient name, doctor name, or visit ID
-                if (not search_query or 
-                    search_query in visit.get("patient_name", "").lower() or
-                    search_query in visit.get("doctor_name", "").lower() or
-                    search_query in visit.get("id", "").lower()):
-                    
-                    # Apply status filter
-                    status_filter = self.visit_status_filter_var.get()
-                    if status_filter == "All" or visit.get("status", "") == status_filter:
-                        self.visit_tree.insert("", tk.END, values=(
-                            visit.get("id", ""),
-                            visit.get("patient_name", visit.get("patient_id", "")),
-                            visit.get("doctor_name", visit.get("doctor_id", "")),
-                            visit.get("visit_date", ""),
-                            visit.get("visit_time", ""),
-                            visit.get("visit_type", ""),
-                            visit.get("priority", ""),
-                            visit.get("status", "")
-                        ))
+            # Apply status filter
+            self._apply_visit_status_filter(status_filter)
                         
         except Exception as e:
             messagebox.showerror("Error", f"Error searching visits: {str(e)}")
     
     def on_visit_status_filter(self, event=None):
         """Handle visit status filter change"""
-        self.on_visit_search()
+        # A pending search applies the status filter when it runs
+        if self._search_after_id:
+            return
+        
+        # Pages are cut from the filtered visits, so search again
+        self._do_visit_search()
     
     def filter_visits_by_date(self):
         """Filter visits by date"""
@@ -740,25 +1072,8 @@ class OPDUI:
             # Validate date format
             datetime.strptime(filter_date, "%Y-%m-%d")
             
-            # Clear existing items
-            for item in self.visit_tree.get_children():
-                self.visit_tree.delete(item)
-            
-            # Load and filter visits
-            visits = self.opd_manager.get_all_visits()
-            
-            for visit in visits:
-                if visit.get("visit_date", "") == filter_date:
-                    self.visit_tree.insert("", tk.END, values=(
-                        visit.get("id", ""),
-                        visit.get("patient_name", visit.get("patient_id", "")),
-                        visit.get("doctor_name", visit.get("doctor_id", "")),
-                        visit.get("visit_date", ""),
-                        visit.get("visit_time", ""),
-                        visit.get("visit_type", ""),
-                        visit.get("priority", ""),
-                        visit.get("status", "")
-                    ))
+            # Load visits for the date from the manager's date index
+            self._show_visits(self.opd_manager.get_visits_by_date(filter_date), rebuild=True)
                     
         except ValueError:
             messagebox.showerror("Error", "Invalid date format! Use YYYY-MM-DD")
@@ -782,10 +1097,10 @@ class OPDUI:
     def edit_visit(self, visit_id):
         """Load visit data for editing"""
         try:
-            visits = self.opd_manager.get_all_visits()
-            visit = next((v for v in visits if v.get('id') == visit_id), None)
+            visit = self.opd_manager.get_visit_by_id(visit_id)
             
             if visit:
+                self._ensure_tab(VISIT_FORM_TAB)
                 self.current_visit_id = visit_id
                 
                 # Fill form with visit data
@@ -798,20 +1113,11 @@ class OPDUI:
                 self.visit_form_vars["payment_amount"].set(visit.get('payment_amount', ''))
                 
                 # Fill text areas
-                self.chief_complaint_text.delete("1.0", tk.END)
-                self.chief_complaint_text.insert("1.0", visit.get('chief_complaint', ''))
-                
-                self.diagnosis_text.delete("1.0", tk.END)
-                self.diagnosis_text.insert("1.0", visit.get('diagnosis', ''))
-                
-                self.treatment_text.delete("1.0", tk.END)
-                self.treatment_text.insert("1.0", visit.get('treatment', ''))
-                
-                self.prescription_text.delete("1.0", tk.END)
-                self.prescription_text.insert("1.0", visit.get('prescription', ''))
-                
-                self.visit_notes_text.delete("1.0", tk.END)
-                self.visit_notes_text.insert("1.0", visit.get('notes', ''))
+                for key, widget in self._visit_text_widgets.items():
+                    value = visit.get(key, '')
+                    widget.delete("1.0", tk.END)
+                    widget.insert("1.0", value)
+                    self._text_cache[key] = value.strip()
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error loading visit data: {str(e)}")
@@ -837,16 +1143,71 @@ class OPDUI:
         item = self.visit_tree.item(selection[0])
         visit_id = item['values'][0]
         
-        try:
-            if self.opd_manager.update_visit(visit_id, {"status": "Completed"}):
-                messagebox.showinfo("Success", "Visit marked as completed!")
-                self.load_visits()
-                self.refresh_queue()
-            else:
-                messagebox.showerror("Error", "Failed to update visit status!")
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Error updating visit: {str(e)}")
+        self._run_io(lambda: self.opd_manager.update_visit(visit_id, {"status": "Completed"}),
+                     lambda updated: self._on_visit_completed(visit_id, updated),
+                     "Error updating visit")
+    
+    def _on_visit_completed(self, visit_id, updated):
+        """Report the result of mark_visit_complete"""
+        if updated:
+            messagebox.showinfo("Success", "Visit marked as completed!")
+            self._clear_visits_snapshot()
+            self._set_visit_row_status(visit_id, "Completed")
+        else:
+            messagebox.showerror("Error", "Failed to update visit status!")
+    
+    def _set_visit_row_status(self, visit_id, status):
+        """Update one visit's status in the list, counters and queue without reloading"""
+        iids = self._visit_iid_by_id.get(visit_id)
+        # With a repeated visit ID it isn't known which row the manager changed
+        if not iids or len(iids) > 1:
+            self._refresh_visit_views()
+            return
+        
+        iid = iids[0]
+        old_row = self._visit_rows[iid]
+        old_status = old_row[7]
+        row = old_row[:7] + (status,)
+        self._visit_rows[iid] = row
+        self._visit_iid_by_status[old_status].discard(iid)
+        self._visit_iid_by_status.setdefault(status, set()).add(iid)
+        self.visit_tree.set(iid, "Status", status)
+        
+        status_filter = self.visit_status_filter_var.get()
+        if status_filter not in ("All", status) and iid in self._visible_visit_iids:
+            self.visit_tree.detach(iid)
+            self._visible_visit_iids.discard(iid)
+        
+        if QUEUE_TAB not in self._initialized_tabs:
+            return
+        if row[3] != datetime.now().strftime("%Y-%m-%d"):
+            return
+        
+        # Move today's visit between the status counters
+        count_vars = {
+            "Waiting": self.waiting_count_var,
+            "In Progress": self.inprogress_count_var,
+            "Completed": self.completed_count_var
+        }
+        if old_status in count_vars:
+            count_var = count_vars[old_status]
+            count_var.set(str(int(count_var.get()) - 1))
+        if status in count_vars:
+            count_var = count_vars[status]
+            count_var.set(str(int(count_var.get()) + 1))
+        
+        if old_status != "Waiting":
+            return
+        
+        # Drop the visit from the queue and renumber the rows after it
+        position = None
+        for queue_iid in self.priority_tree.get_children():
+            if position is not None:
+                self.priority_tree.set(queue_iid, "Position", position)
+                position += 1
+            elif str(self.priority_tree.set(queue_iid, "Action")) == str(visit_id):
+                position = int(self.priority_tree.set(queue_iid, "Position"))
+                self.priority_tree.delete(queue_iid)
     
     def cancel_visit(self):
         """Cancel selected visit"""
@@ -864,8 +1225,7 @@ class OPDUI:
             try:
                 if self.opd_manager.update_visit(visit_id, {"status": "Cancelled"}):
                     messagebox.showinfo("Success", "Visit cancelled successfully!")
-                    self.load_visits()
-                    self.refresh_queue()
+                    self._refresh_visit_views()
                 else:
                     messagebox.showerror("Error", "Failed to cancel visit!")
                     
@@ -886,98 +1246,101 @@ class OPDUI:
         if messagebox.askyesno("Confirm Delete", 
                               f"Are you sure you want to delete the visit for '{patient_name}'?\n\nThis action cannot be undone!"):
             try:
-                visits = self.opd_manager.get_all_visits()
-                visits = [v for v in visits if v.get('id') != visit_id]
-                
-                if self.opd_manager.file_io.save_data(self.opd_manager.filename, visits):
+                if self.opd_manager.delete_visit(visit_id, defer=True):
+                    self._schedule_flush()
                     messagebox.showinfo("Success", "Visit deleted successfully!")
                     self.clear_visit_form()
-                    self.load_visits()
-                    self.refresh_queue()
+                    self._refresh_visit_views()
                 else:
                     messagebox.showerror("Error", "Failed to delete visit!")
                     
             except Exception as e:
                 messagebox.showerror("Error", f"Error deleting visit: {str(e)}")
     
-    def show_visit_context_menu(self, event):
-        """Show context menu for visit list"""
-        selection = self.visit_tree.selection()
-        if not selection:
-            return
-        
+    def create_visit_context_menu(self):
+        """Create the visit list context menu, reused for every right-click"""
         context_menu = tk.Menu(self.window, tearoff=0)
         context_menu.add_command(label="Edit Visit", command=self.edit_selected_visit)
         context_menu.add_command(label="Mark Complete", command=self.mark_visit_complete)
         context_menu.add_command(label="Cancel Visit", command=self.cancel_visit)
         context_menu.add_separator()
         context_menu.add_command(label="Delete Visit", command=self.delete_visit)
+        return context_menu
+    
+    def show_visit_context_menu(self, event):
+        """Show context menu for visit list"""
+        selection = self.visit_tree.selection()
+        if not selection:
+            return
         
         try:
-            context_menu.tk_popup(event.x_root, event.y_root)
+            self._visit_context_menu.tk_popup(event.x_root, event.y_root)
         finally:
-            context_menu.grab_release()
+            self._visit_context_menu.grab_release()
     
     def refresh_queue(self):
         """Refresh queue management"""
         try:
-            visits = self.opd_manager.get_all_visits()
             today = datetime.now().strftime("%Y-%m-%d")
             
-            # Count visits by status
-            waiting_count = len([v for v in visits if v.get('status') == 'Waiting' and v.get('visit_date') == today])
-            inprogress_count = len([v for v in visits if v.get('status') == 'In Progress' and v.get('visit_date') == today])
-            completed_count = len([v for v in visits if v.get('status') == 'Completed' and v.get('visit_date') == today])
+            # Count today's visits by status in the manager's index
+            counts = self.opd_manager.get_status_counts(today)
+            waiting_visits = self.opd_manager.get_waiting_queue(today)
             
-            self.waiting_count_var.set(str(waiting_count))
-            self.inprogress_count_var.set(str(inprogress_count))
-            self.completed_count_var.set(str(completed_count))
+            self.waiting_count_var.set(str(counts.get('Waiting', 0)))
+            self.inprogress_count_var.set(str(counts.get('In Progress', 0)))
+            self.completed_count_var.set(str(counts.get('Completed', 0)))
             
             # Load priority queue
-            self.load_priority_queue()
+            self.load_priority_queue(waiting_visits, today)
             
         except Exception as e:
             messagebox.showerror("Error", f"Error refreshing queue: {str(e)}")
     
-    def load_priority_queue(self):
-        """Load priority queue"""
+    def load_priority_queue(self, waiting_visits, today):
+        """Load priority queue from today's waiting visits, already in queue order"""
         try:
             # Clear existing items
-            for item in self.priority_tree.get_children():
-                self.priority_tree.delete(item)
-            
-            # Get waiting visits for today
-            visits = self.opd_manager.get_all_visits()
-            today = datetime.now().strftime("%Y-%m-%d")
-            waiting_visits = [v for v in visits if v.get('status') == 'Waiting' and v.get('visit_date') == today]
+            children = self.priority_tree.get_children()
+            if children:
+                self.priority_tree.delete(*children)
             
-            # Sort by priority and time
-            priority_order = {"Emergency": 1, "High": 2, "Normal": 3, "Low": 4}
-            waiting_visits.sort(key=lambda x: (priority_order.get(x.get('priority', 'Normal'), 3), x.get('visit_time', '')))
+            # Visits are all from today, so wait times only need the time of day
+            now = datetime.now()
+            now_seconds = now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
             
             # Add to priority queue
-            for position, visit in enumerate(waiting_visits, 1):
-                # Calculate wait time
-                visit_time = visit.get('visit_time', '')
-                if visit_time:
-                    try:
-                        visit_datetime = datetime.strptime(f"{today} {visit_time}", "%Y-%m-%d %H:%M:%S")
-                        wait_time = datetime.now() - visit_datetime
-                        wait_minutes = int(wait_time.total_seconds() / 60)
-                        wait_str = f"{wait_minutes} min"
-                    except:
+            insert = self.priority_tree.insert
+            with _bulk_update(self.priority_tree):
+                for position, visit in enumerate(waiting_visits, 1):
+                    # Calculate wait time
+                    visit_time = visit.get('visit_time', '')
+                    if visit_time:
+                        try:
+                            hours, minutes, seconds = visit_time.split(':')
+                            visit_seconds = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+                            wait_minutes = int((now_seconds - visit_seconds) / 60)
+                            wait_str = f"{wait_minutes} min"
+                        except ValueError:
+                            wait_str = "N/A"
+                    else:
                         wait_str = "N/A"
-                else:
-                    wait_str = "N/A"
                 
-                self.priority_tree.insert("", tk.END, values=(
-                    position,
-                    visit.get("patient_name", visit.get("patient_id", "")),
-                    visit.get("priority", ""),
-                    visit.get("chief_complaint", "")[:50] + "..." if len(visit.get("chief_complaint", "")) > 50 else visit.get("chief_complaint", ""),
-                    wait_str,
-                    visit.get("id", "")
-                ))
+                    patient_name = visit.get("patient_name")
+                    if patient_name is None:
+                        patient_name = visit.get("patient_id", "")
+                    chief_complaint = visit.get("chief_complaint", "")
+                    if len(chief_complaint) > 50:
+                        chief_complaint = chief_complaint[:50] + "..."
+                    
+                    insert("", "end", values=(
+                        position,
+                        patient_name,
+                        visit.get("priority", ""),
+                        chief_complaint,
+                        wait_str,
+                        visit.get("id", "")
+                    ))
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error loading priority queue: {str(e)}")
@@ -995,8 +1358,7 @@ class OPDUI:
         try:
             if self.opd_manager.update_visit(visit_id, {"status": "In Progress"}):
                 messagebox.showinfo("Success", "Visit moved to in progress!")
-                self.load_visits()
-                self.refresh_queue()
+                self._refresh_visit_views()
             else:
                 messagebox.showerror("Error", "Failed to update visit status!")
                 
@@ -6,10 +6,162 @@ Comprehensive view of patient information, history, appointments, and medical re
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import logging
 import os
 
 from utils.file_io import PatientManager, AppointmentManager, OPDManager, DoctorManager
-from utils.pdf_generator import PDFGenerator
+
+logger = logging.getLogger(__name__)
+
+# Delay before a patient search runs, so a burst of keystrokes triggers one search
+_SEARCH_DELAY_MS = 150
+
+# How often a pending background fetch is checked for completion
+_IO_POLL_MS = 30
+
+# Rows inserted into a detail tab per idle callback, so long lists don't block repaints
+_INSERT_CHUNK_SIZE = 50
+
+# Patient list rows are inserted in batches of this size as the list is scrolled
+_PATIENT_BATCH_SIZE = 100
+
+# Fraction of the inserted rows scrolled past before the next batch is inserted
+_PATIENT_PREFETCH_AT = 0.9
+
+def _render_patient_pdf(patient_id):
+    """Generate a patient summary PDF; runs in a worker process"""
+    # Imported here so only the worker process loads the PDF libraries
+    from utils.pdf_generator import PDFGenerator
+    return PDFGenerator().generate_patient_summary(patient_id)
+
+# Tcl lambdas that insert a list of value lists at the end of a tree, with
+# or without item IDs, so a batch of rows crosses from Python to Tcl in one call
+_INSERT_ROWS_TCL = "{tree rows} {foreach row $rows {$tree insert {} end -values $row}}"
+_INSERT_ROWS_WITH_IIDS_TCL = "{tree iids rows} {foreach iid $iids row $rows {$tree insert {} end -id $iid -values $row}}"
+
+def _insert_rows(tree, rows, iids=None):
+    """Append rows of column values to a Treeview in a single Tcl call"""
+    if iids is None:
+        tree.tk.call("apply", _INSERT_ROWS_TCL, str(tree), tuple(rows))
+    else:
+        tree.tk.call("apply", _INSERT_ROWS_WITH_IIDS_TCL, str(tree), tuple(iids), tuple(rows))
+
+def _row_iids(records):
+    """Tree item IDs for records: each record's ID, or a generated one when it is missing or already used"""
+    used = set()
+    iids = []
+    generated = 0
+    for record in records:
+        iid = record.get('id')
+        iid = str(iid) if iid not in (None, '') else ''
+        while not iid or iid in used:
+            generated += 1
+            iid = f"row{generated}"
+        used.add(iid)
+        iids.append(iid)
+    return iids
+
+def _trunc(text, limit=50):
+    """Shorten text longer than limit characters, marking the cut with an ellipsis"""
+    return text if len(text) <= limit else text[:limit] + "..."
+
+@dataclass(slots=True)
+class PatientRow:
+    """A patient as shown in the selection list"""
+    id: str
+    name: str
+    age: str
+    phone: str
+    # Lowercase name, ID and phone, separated so matches stay within a field
+    search_key: str
+    
+    @classmethod
+    def from_patient(cls, patient):
+        """Build a row from a patient record"""
+        patient_id = patient.get('id', '')
+        name = patient.get('name', '')
+        phone = patient.get('phone', '')
+        return cls(patient_id, name, patient.get('age', ''), phone,
+                   f"{name}\0{patient_id}\0{phone}".lower())
+    
+    def values(self):
+        """Column values for the selection list"""
+        return (self.id, self.name, self.age, self.phone)
+
+# Font for field captions
+_BOLD_FONT = ('Arial', 10, 'bold')
+
+# Patient selection list columns and their widths
+_PATIENT_COLUMNS = (
+    ("ID", 80),
+    ("Name", 150),
+    ("Age", 60),
+    ("Phone", 120)
+)
+
+# Medical history tab columns and their widths
+_MEDICAL_HISTORY_COLUMNS = (
+    ("Date", 100),
+    ("Doctor", 120),
+    ("Diagnosis", 150),
+    ("Treatment", 150),
+    ("Prescription", 150),
+    ("Notes", 150)
+)
+
+# Appointments tab columns and their widths
+_APPOINTMENT_COLUMNS = (
+    ("ID", 80),
+    ("Date", 100),
+    ("Time", 80),
+    ("Doctor", 120),
+    ("Type", 120),
+    ("Status", 100),
+    ("Notes", 200)
+)
+
+# OPD visits tab columns and their widths
+_OPD_VISIT_COLUMNS = (
+    ("ID", 80),
+    ("Date", 100),
+    ("Time", 80),
+    ("Doctor", 120),
+    ("Type", 120),
+    ("Priority", 80),
+    ("Status", 100),
+    ("Chief Complaint", 200)
+)
+
+# Payment history tab columns and their widths
+_PAYMENT_COLUMNS = (
+    ("Date", 100),
+    ("Visit/Appointment", 120),
+    ("Service", 150),
+    ("Amount", 100),
+    ("Payment Method", 120),
+    ("Status", 100)
+)
+
+# Personal information tab rows as (label, patient field)
+_PERSONAL_INFO_FIELDS = (
+    ("Patient ID", "id"),
+    ("Name", "name"),
+    ("Age", "age"),
+    ("Gender", "gender"),
+    ("Phone", "phone"),
+    ("Email", "email"),
+    ("Address", "address"),
+    ("Blood Group", "blood_group"),
+    ("Emergency Contact", "emergency_contact"),
+    ("Registration Date", "registration_date"),
+    ("Medical History", "medical_history")
+)
+
+# Notebook tab indices
+(PERSONAL_INFO_TAB, MEDICAL_HISTORY_TAB, APPOINTMENTS_TAB,
+ OPD_VISITS_TAB, PAYMENT_HISTORY_TAB) = range(5)
 
 class PatientDetails:
     def __init__(self, parent):
@@ -18,8 +170,40 @@ class PatientDetails:
         self.appointment_manager = AppointmentManager()
         self.opd_manager = OPDManager()
         self.doctor_manager = DoctorManager()
-        self.pdf_generator = PDFGenerator()
+        # PDFs render in a separate process so the window stays responsive;
+        # the pool starts its worker on the first PDF
+        self._pdf_executor = ProcessPoolExecutor(max_workers=1)
         self.current_patient = None
+        # Current patient's visits and appointments, newest first
+        self._visits = []
+        self._appointments = []
+        # Details windows by data type, hidden rather than destroyed when closed
+        self._details_windows = {}
+        # Doctor names by ID, for records saved without a doctor name, and the
+        # doctors file signature they were read at
+        self._doctor_names = {}
+        self._doctor_names_signature = None
+        self._patient_rows = []
+        self._rendered_patient_count = 0
+        self._render_pending = False
+        self._search_after_id = None
+        self._patients = []
+        self._patients_signature = None
+        # One PatientRow per patient in self._patients
+        self._all_patient_rows = []
+        self._last_query = ""
+        self._last_matches = []
+        # Tabs whose contents are loaded for the current patient
+        self._loaded_tabs = set()
+        # Latest chunked insert per tree; older inserts stop when superseded
+        self._insert_tokens = {}
+        # Record shown in each tree row, by tree and then item ID, for the details windows
+        self._row_records = {}
+        self._records_token = 0
+        self._records_pending = False
+        self._pending_io = 0
+        # Visits and appointments are fetched in parallel off the Tk thread
+        self._io_executor = ThreadPoolExecutor(max_workers=2)
         
         self.create_window()
         self.setup_ui()
@@ -32,6 +216,8 @@ class PatientDetails:
         self.window.geometry("1400x900")
         self.window.transient(self.parent)
         self.window.grab_set()
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.window.bind("<F5>", lambda e: self.refresh_list())
         
         # Center the window
         self.window.update_idletasks()
@@ -58,6 +244,10 @@ class PatientDetails:
         
         # Right panel - Patient details
         self.create_patient_details_panel(paned)
+        
+        # Status bar for problems that shouldn't interrupt with a dialog
+        self.status_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.status_var, foreground='red').pack(fill=tk.X, pady=(5, 0))
     
     def create_patient_selection_panel(self, parent):
         """Create patient selection panel"""
@@ -74,9 +264,9 @@ class PatientDetails:
         search_input_frame.pack(fill=tk.X, pady=5)
         
         self.patient_search_var = tk.StringVar()
-        self.patient_search_var.trace('w', self.on_patient_search)
         search_entry = ttk.Entry(search_input_frame, textvariable=self.patient_search_var, width=25)
         search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 10))
+        search_entry.bind("<KeyRelease>", self.on_patient_search)
         
         ttk.Button(search_input_frame, text="Clear", 
                   command=self.clear_patient_search).pack(side=tk.LEFT)
@@ -85,24 +275,23 @@ class PatientDetails:
         list_frame = ttk.Frame(selection_frame)
         list_frame.pack(fill=tk.BOTH, expand=True)
         
-        columns = ("ID", "Name", "Age", "Phone")
+        columns = [col for col, width in _PATIENT_COLUMNS]
         self.patient_tree = ttk.Treeview(list_frame, columns=columns, show="headings", height=20)
         
         # Configure columns
-        column_widths = {"ID": 80, "Name": 150, "Age": 60, "Phone": 120}
-        for col in columns:
+        for col, width in _PATIENT_COLUMNS:
             self.patient_tree.heading(col, text=col)
-            self.patient_tree.column(col, width=column_widths[col])
+            self.patient_tree.column(col, width=width)
         
         # Scrollbar
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.patient_tree.yview)
-        self.patient_tree.configure(yscrollcommand=scrollbar.set)
+        self.patient_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.patient_tree.yview)
+        self.patient_tree.configure(yscrollcommand=self.on_patient_scroll)
         
         self.patient_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.patient_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
         # Bind events
-        self.patient_tree.bind("<Button-1>", self.on_patient_select)
+        self.patient_tree.bind("<<TreeviewSelect>>", self.on_patient_select)
         self.patient_tree.bind("<Double-1>", self.on_patient_double_click)
         
         # Action buttons
@@ -114,7 +303,7 @@ class PatientDetails:
         ttk.Button(button_frame, text="Generate PDF", 
                   command=self.generate_patient_pdf).pack(fill=tk.X, pady=2)
         ttk.Button(button_frame, text="Refresh List", 
-                  command=self.load_patients).pack(fill=tk.X, pady=2)
+                  command=self.refresh_list).pack(fill=tk.X, pady=2)
     
     def create_patient_details_panel(self, parent):
         """Create patient details panel"""
@@ -127,6 +316,7 @@ class PatientDetails:
         # Notebook for different sections
         notebook = ttk.Notebook(details_frame)
         notebook.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
+        self.notebook = notebook
         
         # Personal Information tab
         self.create_personal_info_tab(notebook)
@@ -142,6 +332,16 @@ class PatientDetails:
         
         # Payment History tab
         self.create_payment_history_tab(notebook)
+        
+        # Tab contents are loaded when a tab is first shown for a patient
+        self._tab_loaders = {
+            PERSONAL_INFO_TAB: lambda: self.load_personal_information(self.current_patient),
+            MEDICAL_HISTORY_TAB: self.load_medical_history,
+            APPOINTMENTS_TAB: self.load_patient_appointments,
+            OPD_VISITS_TAB: self.load_patient_opd_visits,
+            PAYMENT_HISTORY_TAB: self.load_payment_history
+        }
+        notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
     
     def create_patient_info_header(self, parent):
         """Create patient information header"""
@@ -161,21 +361,21 @@ class PatientDetails:
         self.patient_age_var = tk.StringVar(value="")
         self.patient_gender_var = tk.StringVar(value="")
         
-        ttk.Label(left_frame, text="Name:", font=('Arial', 10, 'bold')).grid(row=0, column=0, sticky=tk.W, pady=2)
+        ttk.Label(left_frame, text="Name:", font=_BOLD_FONT).grid(row=0, column=0, sticky=tk.W, pady=2)
         ttk.Label(left_frame, textvariable=self.patient_name_var, 
                  font=('Arial', 12, 'bold'), foreground='blue').grid(row=0, column=1, sticky=tk.W, padx=(10, 0), pady=2)
         
-        ttk.Label(left_frame, text="Patient ID:", font=('Arial', 10, 'bold')).grid(row=1, column=0, sticky=tk.W, pady=2)
+        ttk.Label(left_frame, text="Patient ID:", font=_BOLD_FONT).grid(row=1, column=0, sticky=tk.W, pady=2)
         ttk.Label(left_frame, textvariable=self.patient_id_var).grid(row=1, column=1, sticky=tk.W, padx=(10, 0), pady=2)
         
         # Right column
         right_frame = ttk.Frame(info_grid)
         right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
         
-        ttk.Label(right_frame, text="Age:", font=('Arial', 10, 'bold')).grid(row=0, column=0, sticky=tk.W, pady=2)
+        ttk.Label(right_frame, text="Age:", font=_BOLD_FONT).grid(row=0, column=0, sticky=tk.W, pady=2)
         ttk.Label(right_frame, textvariable=self.patient_age_var).grid(row=0, column=1, sticky=tk.W, padx=(10, 0), pady=2)
         
-        ttk.Label(right_frame, text="Gender:", font=('Arial', 10, 'bold')).grid(row=1, column=0, sticky=tk.W, pady=2)
+        ttk.Label(right_frame, text="Gender:", font=_BOLD_FONT).grid(row=1, column=0, sticky=tk.W, pady=2)
         ttk.Label(right_frame, textvariable=self.patient_gender_var).grid(row=1, column=1, sticky=tk.W, padx=(10, 0), pady=2)
         
         # Statistics
@@ -205,58 +405,22 @@ class PatientDetails:
         info_container = ttk.LabelFrame(info_frame, text="Patient Details", padding=20)
         info_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
         
-        # Create scrollable frame
-        canvas = tk.Canvas(info_container)
-        scrollbar = ttk.Scrollbar(info_container, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas)
-        
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
+        # Personal information fields, one (field, value) row each
+        self.personal_info_tree = ttk.Treeview(info_container, columns=("Field", "Value"), show="headings")
+        self.personal_info_tree.heading("Field", text="Field")
+        self.personal_info_tree.heading("Value", text="Value")
+        self.personal_info_tree.column("Field", width=150, stretch=False)
+        self.personal_info_tree.column("Value", width=500)
         
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
+        # Rows are created once and keyed by field name; loading only sets values
+        for label_text, field_name in _PERSONAL_INFO_FIELDS:
+            self.personal_info_tree.insert("", tk.END, iid=field_name, values=(label_text, ""))
         
-        # Personal information fields
-        self.personal_info_vars = {}
-        fields = [
-            ("Patient ID", "id"),
-            ("Name", "name"),
-            ("Age", "age"),
-            ("Gender", "gender"),
-            ("Phone", "phone"),
-            ("Email", "email"),
-            ("Address", "address"),
-            ("Blood Group", "blood_group"),
-            ("Emergency Contact", "emergency_contact"),
-            ("Registration Date", "registration_date"),
-            ("Medical History", "medical_history")
-        ]
+        scrollbar = ttk.Scrollbar(info_container, orient=tk.VERTICAL, command=self.personal_info_tree.yview)
+        self.personal_info_tree.configure(yscrollcommand=scrollbar.set)
         
-        row = 0
-        for label_text, field_name in fields:
-            ttk.Label(scrollable_frame, text=f"{label_text}:", 
-                     font=('Arial', 10, 'bold')).grid(row=row, column=0, sticky=tk.NW, pady=5, padx=(0, 20))
-            
-            self.personal_info_vars[field_name] = tk.StringVar()
-            
-            if field_name in ["address", "medical_history"]:
-                # Text widget for long text
-                text_widget = tk.Text(scrollable_frame, height=4, width=50, wrap=tk.WORD, state=tk.DISABLED)
-                text_widget.grid(row=row, column=1, sticky=tk.W, pady=5)
-                self.personal_info_vars[f"{field_name}_widget"] = text_widget
-            else:
-                # Label for regular text
-                info_label = ttk.Label(scrollable_frame, textvariable=self.personal_info_vars[field_name], 
-                                     wraplength=400, font=('Arial', 10))
-                info_label.grid(row=row, column=1, sticky=tk.W, pady=5)
-            
-            row += 1
-        
-        # Pack canvas and scrollbar
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        self.personal_info_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
     
     def create_medical_history_tab(self, notebook):
         """Create medical history tab"""
@@ -268,14 +432,13 @@ class PatientDetails:
         history_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
         
         # Combined medical history from OPD visits
-        columns = ("Date", "Doctor", "Diagnosis", "Treatment", "Prescription", "Notes")
+        columns = [col for col, width in _MEDICAL_HISTORY_COLUMNS]
         self.medical_history_tree = ttk.Treeview(history_container, columns=columns, show="headings", height=15)
         
         # Configure columns
-        column_widths = {"Date": 100, "Doctor": 120, "Diagnosis": 150, "Treatment": 150, "Prescription": 150, "Notes": 150}
-        for col in columns:
+        for col, width in _MEDICAL_HISTORY_COLUMNS:
             self.medical_history_tree.heading(col, text=col)
-            self.medical_history_tree.column(col, width=column_widths[col])
+            self.medical_history_tree.column(col, width=width)
         
         # Scrollbars
         v_scrollbar_med = ttk.Scrollbar(history_container, orient=tk.VERTICAL, command=self.medical_history_tree.yview)
@@ -307,20 +470,19 @@ class PatientDetails:
         filter_combo.bind("<<ComboboxSelected>>", self.filter_appointments)
         
         ttk.Button(filter_frame, text="Refresh", 
-                  command=self.load_patient_appointments).pack(side=tk.LEFT, padx=20)
+                  command=self.refresh_patient_records).pack(side=tk.LEFT, padx=20)
         
         # Appointments list
         appointments_container = ttk.LabelFrame(appointments_frame, text="Appointment History", padding=10)
         appointments_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
         
-        columns = ("ID", "Date", "Time", "Doctor", "Type", "Status", "Notes")
+        columns = [col for col, width in _APPOINTMENT_COLUMNS]
         self.appointments_tree = ttk.Treeview(appointments_container, columns=columns, show="headings", height=15)
         
         # Configure columns
-        column_widths = {"ID": 80, "Date": 100, "Time": 80, "Doctor": 120, "Type": 120, "Status": 100, "Notes": 200}
-        for col in columns:
+        for col, width in _APPOINTMENT_COLUMNS:
             self.appointments_tree.heading(col, text=col)
-            self.appointments_tree.column(col, width=column_widths[col])
+            self.appointments_tree.column(col, width=width)
         
         # Scrollbars
         v_scrollbar_apt = ttk.Scrollbar(appointments_container, orient=tk.VERTICAL, command=self.appointments_tree.yview)
@@ -352,21 +514,19 @@ class PatientDetails:
         visit_filter_combo.bind("<<ComboboxSelected>>", self.filter_opd_visits)
         
         ttk.Button(visit_filter_frame, text="Refresh", 
-                  command=self.load_patient_opd_visits).pack(side=tk.LEFT, padx=20)
+                  command=self.refresh_patient_records).pack(side=tk.LEFT, padx=20)
         
         # OPD visits list
         visits_container = ttk.LabelFrame(visits_frame, text="OPD Visit History", padding=10)
         visits_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
         
-        columns = ("ID", "Date", "Time", "Doctor", "Type", "Priority", "Status", "Chief Complaint")
+        columns = [col for col, width in _OPD_VISIT_COLUMNS]
         self.opd_visits_tree = ttk.Treeview(visits_container, columns=columns, show="headings", height=15)
         
         # Configure columns
-        column_widths = {"ID": 80, "Date": 100, "Time": 80, "Doctor": 120, "Type": 120, 
-                        "Priority": 80, "Status": 100, "Chief Complaint": 200}
-        for col in columns:
+        for col, width in _OPD_VISIT_COLUMNS:
             self.opd_visits_tree.heading(col, text=col)
-            self.opd_visits_tree.column(col, width=column_widths[col])
+            self.opd_visits_tree.column(col, width=width)
         
         # Scrollbars
         v_scrollbar_opd = ttk.Scrollbar(visits_container, orient=tk.VERTICAL, command=self.opd_visits_tree.yview)
@@ -396,30 +556,28 @@ class PatientDetails:
         self.pending_payments_var = tk.StringVar(value="₹0.00")
         self.last_payment_var = tk.StringVar(value="Never")
         
-        ttk.Label(summary_grid, text="Total Paid:", font=('Arial', 10, 'bold')).grid(row=0, column=0, sticky=tk.W, padx=(0, 20))
+        ttk.Label(summary_grid, text="Total Paid:", font=_BOLD_FONT).grid(row=0, column=0, sticky=tk.W, padx=(0, 20))
         ttk.Label(summary_grid, textvariable=self.total_payments_var, 
                  font=('Arial', 12, 'bold'), foreground='green').grid(row=0, column=1, sticky=tk.W)
         
-        ttk.Label(summary_grid, text="Pending:", font=('Arial', 10, 'bold')).grid(row=0, column=2, sticky=tk.W, padx=(40, 20))
+        ttk.Label(summary_grid, text="Pending:", font=_BOLD_FONT).grid(row=0, column=2, sticky=tk.W, padx=(40, 20))
         ttk.Label(summary_grid, textvariable=self.pending_payments_var, 
                  font=('Arial', 12, 'bold'), foreground='red').grid(row=0, column=3, sticky=tk.W)
         
-        ttk.Label(summary_grid, text="Last Payment:", font=('Arial', 10, 'bold')).grid(row=0, column=4, sticky=tk.W, padx=(40, 20))
+        ttk.Label(summary_grid, text="Last Payment:", font=_BOLD_FONT).grid(row=0, column=4, sticky=tk.W, padx=(40, 20))
         ttk.Label(summary_grid, textvariable=self.last_payment_var, foreground='blue').grid(row=0, column=5, sticky=tk.W)
         
         # Payment history list
         payment_container = ttk.LabelFrame(payment_frame, text="Payment Details", padding=10)
         payment_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
         
-        columns = ("Date", "Visit/Appointment", "Service", "Amount", "Payment Method", "Status")
+        columns = [col for col, width in _PAYMENT_COLUMNS]
         self.payment_tree = ttk.Treeview(payment_container, columns=columns, show="headings", height=15)
         
         # Configure columns
-        column_widths = {"Date": 100, "Visit/Appointment": 120, "Service": 150, 
-                        "Amount": 100, "Payment Method": 120, "Status": 100}
-        for col in columns:
+        for col, width in _PAYMENT_COLUMNS:
             self.payment_tree.heading(col, text=col)
-            self.payment_tree.column(col, width=column_widths[col])
+            self.payment_tree.column(col, width=width)
         
         # Scrollbars
         v_scrollbar_pay = ttk.Scrollbar(payment_container, orient=tk.VERTICAL, command=self.payment_tree.yview)
@@ -433,57 +591,100 @@ class PatientDetails:
     def load_patients(self):
         """Load patients into selection list"""
         try:
-            # Clear existing items
-            for item in self.patient_tree.get_children():
-                self.patient_tree.delete(item)
-            
-            # Load patients
-            patients = self.patient_manager.get_all_patients()
-            
-            for patient in patients:
-                self.patient_tree.insert("", tk.END, values=(
-                    patient.get("id", ""),
-                    patient.get("name", ""),
-                    patient.get("age", ""),
-                    patient.get("phone", "")
-                ))
+            # Load patients, rebuilding rows only if the file changed
+            patients = self._all_patients()
+            if patients is not self._patients:
+                self._patients = patients
+                self._all_patient_rows = [PatientRow.from_patient(patient) for patient in patients]
+            self._last_query = ""
+            self._last_matches = range(len(patients))
+            self.show_patients(self._all_patient_rows)
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error loading patients: {str(e)}")
     
+    def refresh_list(self):
+        """Reload the patient list and the loaded patient's details"""
+        self.load_patients()
+        if self.current_patient:
+            self.load_patient_details(self.current_patient.get('id'), force=True)
+    
+    def _all_patients(self):
+        """All patients, re-read only when the patients file has changed"""
+        file_io = self.patient_manager.file_io
+        signature = file_io.file_signature(self.patient_manager.filename)
+        if signature is None or signature != self._patients_signature:
+            self._patients_signature = signature
+            return self.patient_manager.get_all_patients()
+        return self._patients
+    
+    def show_patients(self, rows):
+        """Show patient rows in the selection list, inserting them as they scroll into view"""
+        # Clear existing items
+        children = self.patient_tree.get_children()
+        if children:
+            self.patient_tree.delete(*children)
+        
+        self._patient_rows = rows
+        self._rendered_patient_count = 0
+        self.render_more_patients()
+    
+    def render_more_patients(self):
+        """Insert the next batch of patient rows into the selection list"""
+        self._render_pending = False
+        start = self._rendered_patient_count
+        end = min(start + _PATIENT_BATCH_SIZE, len(self._patient_rows))
+        _insert_rows(self.patient_tree, [row.values() for row in self._patient_rows[start:end]])
+        self._rendered_patient_count = end
+    
+    def on_patient_scroll(self, first, last):
+        """Update the scrollbar and insert more rows when the end of the list is near"""
+        self.patient_scrollbar.set(first, last)
+        if (not self._render_pending
+                and self._rendered_patient_count < len(self._patient_rows)
+                and float(last) >= _PATIENT_PREFETCH_AT):
+            self._render_pending = True
+            self.window.after_idle(self.render_more_patients)
+    
     def on_patient_search(self, *args):
-        """Handle patient search"""
-        search_query = self.patient_search_var.get().strip()
+        """Handle patient search, waiting for typing to pause"""
+        if self._search_after_id:
+            self.window.after_cancel(self._search_after_id)
+        self._search_after_id = self.window.after(_SEARCH_DELAY_MS, self._do_patient_search)
+    
+    def _do_patient_search(self):
+        """Run the patient search for the current query"""
+        self._search_after_id = None
+        search_query = self.patient_search_var.get().strip().lower()
         
         try:
-            # Clear existing items
-            for item in self.patient_tree.get_children():
-                self.patient_tree.delete(item)
-            
-            # Search patients
-            if search_query:
-                patients = self.patient_manager.search_patients(search_query)
+            # Search the rows built by load_patients, narrowing the previous
+            # matches when the query extends the previous query
+            rows = self._all_patient_rows
+            if self._last_query in search_query:
+                candidates = self._last_matches
             else:
-                patients = self.patient_manager.get_all_patients()
+                candidates = range(len(rows))
+            matches = [i for i in candidates if search_query in rows[i].search_key]
+            
+            self._last_query = search_query
+            self._last_matches = matches
             
             # Populate tree
-            for patient in patients:
-                self.patient_tree.insert("", tk.END, values=(
-                    patient.get("id", ""),
-                    patient.get("name", ""),
-                    patient.get("age", ""),
-                    patient.get("phone", "")
-                ))
+            self.show_patients([rows[i] for i in matches])
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error searching patients: {str(e)}")
     
     def clear_patient_search(self):
         """Clear patient search"""
+        if self._search_after_id:
+            self.window.after_cancel(self._search_after_id)
         self.patient_search_var.set("")
+        self._do_patient_search()
     
     def on_patient_select(self, event):
-        """Handle patient selection"""
+        """Handle patient selection once the tree has updated its selection"""
         selection = self.patient_tree.selection()
         if selection:
             item = self.patient_tree.item(selection[0])
@@ -505,8 +706,12 @@ class PatientDetails:
         patient_id = item['values'][0]
         self.load_patient_details(patient_id)
     
-    def load_patient_details(self, patient_id):
+    def load_patient_details(self, patient_id, force=False):
         """Load comprehensive patient details"""
+        # The loaded patient is only reloaded on an explicit refresh
+        if not force and self.current_patient and str(self.current_patient.get('id')) == str(patient_id):
+            return
+        
         try:
             # Get patient data
             patient = self.patient_manager.get_patient_by_id(patient_id)
@@ -515,6 +720,7 @@ class PatientDetails:
                 return
             
             self.current_patient = patient
+            self.status_var.set("")
             
             # Update header information
             self.patient_name_var.set(patient.get('name', 'Unknown'))
@@ -522,38 +728,119 @@ class PatientDetails:
             self.patient_age_var.set(patient.get('age', ''))
             self.patient_gender_var.set(patient.get('gender', ''))
             
-            # Load personal information
-            self.load_personal_information(patient)
+            # Fetch visits and appointments once for all tabs
+            self.refresh_patient_records()
             
-            # Load medical history, appointments, and visits
-            self.load_patient_appointments()
-            self.load_patient_opd_visits()
-            self.load_medical_history()
-            self.load_payment_history()
-            
-            # Update statistics
+        except Exception as e:
+            messagebox.showerror("Error", f"Error loading patient details: {str(e)}")
+    
+    def fetch_patient_visits(self, patient_id):
+        """Fetch a patient's visits, newest first; runs on the I/O threads"""
+        visits = self.opd_manager.get_visits_by_patient(patient_id)
+        visits.reverse()
+        return visits
+    
+    def fetch_patient_appointments(self, patient_id):
+        """Fetch a patient's appointments, newest first; runs on the I/O threads"""
+        appointments = self.appointment_manager.get_appointments_by_patient(patient_id)
+        appointments.reverse()
+        return appointments
+    
+    def fetch_doctor_names(self):
+        """(signature, names by doctor ID), or None if the doctors file is unchanged; runs on the I/O threads"""
+        signature = self.doctor_manager.file_io.file_signature(self.doctor_manager.filename)
+        if signature is not None and signature == self._doctor_names_signature:
+            return None
+        return signature, {d.get('id'): d.get('name', d.get('id')) for d in self.doctor_manager.get_all_doctors()}
+    
+    def _doctor_name(self, record):
+        """Doctor name for a visit or appointment, looked up by ID if not stored on it"""
+        doctor_name = record.get("doctor_name")
+        if doctor_name:
+            return doctor_name
+        doctor_id = record.get("doctor_id", "")
+        return self._doctor_names.get(doctor_id, doctor_id)
+    
+    def refresh_patient_records(self):
+        """Re-fetch the current patient's records off the Tk thread, then reload the visible tab"""
+        if not self.current_patient:
+            return
+        
+        # Tabs wait for the new records instead of showing the previous ones
+        self._records_token += 1
+        token = self._records_token
+        self._records_pending = True
+        self._loaded_tabs.clear()
+        
+        patient_id = self.current_patient['id']
+        futures = (
+            self._io_executor.submit(self.fetch_patient_visits, patient_id),
+            self._io_executor.submit(self.fetch_patient_appointments, patient_id),
+            self._io_executor.submit(self.fetch_doctor_names)
+        )
+        self._pending_io += 1
+        self.window.config(cursor="watch")
+        self.window.after(_IO_POLL_MS, self._check_records, futures, token)
+    
+    def _check_records(self, futures, token):
+        """Poll the record fetches and show the records once all finish"""
+        if not self.window.winfo_exists():
+            return
+        if not all(future.done() for future in futures):
+            self.window.after(_IO_POLL_MS, self._check_records, futures, token)
+            return
+        
+        self._pending_io -= 1
+        if not self._pending_io:
+            self.window.config(cursor="")
+        
+        # A newer fetch has been requested since this one started
+        if token != self._records_token:
+            return
+        self._records_pending = False
+        
+        try:
+            visits_future, appointments_future, doctor_names_future = futures
+            self._visits = visits_future.result()
+            self._appointments = appointments_future.result()
+            doctor_names = doctor_names_future.result()
+            if doctor_names is not None:
+                self._doctor_names_signature, self._doctor_names = doctor_names
+            self.ensure_tab_loaded(self.notebook.index("current"))
             self.update_patient_statistics()
             
         except Exception as e:
             messagebox.showerror("Error", f"Error loading patient details: {str(e)}")
     
+    def on_close(self):
+        """Stop background fetches and close the window"""
+        self._io_executor.shutdown(wait=False)
+        self._pdf_executor.shutdown(wait=False)
+        self.window.destroy()
+    
+    def on_tab_changed(self, event=None):
+        """Load the newly shown tab if it has not been loaded for this patient"""
+        self.ensure_tab_loaded(self.notebook.index("current"))
+    
+    def ensure_tab_loaded(self, index):
+        """Load a tab's contents for the current patient once"""
+        if not self.current_patient or self._records_pending or index in self._loaded_tabs:
+            return
+        self._loaded_tabs.add(index)
+        self._tab_loaders[index]()
+    
     def load_personal_information(self, patient):
         """Load personal information"""
         try:
-            for field_name, var in self.personal_info_vars.items():
-                if field_name.endswith("_widget"):
-                    # Handle text widgets
-                    widget = var
-                    field_name = field_name.replace("_widget", "")
-                    widget.config(state=tk.NORMAL)
-                    widget.delete("1.0", tk.END)
-                    widget.insert("1.0", patient.get(field_name, "Not provided"))
-                    widget.config(state=tk.DISABLED)
-                elif isinstance(var, tk.StringVar):
-                    var.set(patient.get(field_name, "Not provided"))
-                    
-        except Exception as e:
-            messagebox.showerror("Error", f"Error loading personal information: {str(e)}")
+            tree = self.personal_info_tree
+            for label_text, field_name in _PERSONAL_INFO_FIELDS:
+                # Rows are one line high, so long text is shown on one line
+                value = str(patient.get(field_name, "Not provided")).replace("\n", " ")
+                tree.set(field_name, "Value", value)
+                
+        except Exception:
+            logger.exception("Error loading personal information")
+            self.status_var.set("Error loading personal information; see log for details")
     
     def load_patient_appointments(self):
         """Load patient appointments"""
@@ -562,33 +849,33 @@ class PatientDetails:
         
         try:
             # Clear existing items
-            for item in self.appointments_tree.get_children():
-                self.appointments_tree.delete(item)
+            children = self.appointments_tree.get_children()
+            if children:
+                self.appointments_tree.delete(*children)
             
-            # Get appointments
-            appointments = self.appointment_manager.get_appointments_by_patient(self.current_patient['id'])
-            
-            # Apply filter
+            # Apply filter to the fetched appointments (newest first)
+            appointments = self._appointments
             filter_status = self.appointment_filter_var.get()
             if filter_status != "All":
                 appointments = [apt for apt in appointments if apt.get('status') == filter_status]
             
-            # Sort by date (newest first)
-            appointments.sort(key=lambda x: x.get('appointment_date', ''), reverse=True)
+            # Build all rows first, then insert them
+            doctor_name = self._doctor_name
+            rows = [(
+                appointment.get("id", ""),
+                appointment.get("appointment_date", ""),
+                appointment.get("appointment_time", ""),
+                doctor_name(appointment),
+                appointment.get("appointment_type", ""),
+                appointment.get("status", ""),
+                _trunc(appointment.get("notes", ""))
+            ) for appointment in appointments]
             
-            for appointment in appointments:
-                self.appointments_tree.insert("", tk.END, values=(
-                    appointment.get("id", ""),
-                    appointment.get("appointment_date", ""),
-                    appointment.get("appointment_time", ""),
-                    appointment.get("doctor_name", appointment.get("doctor_id", "")),
-                    appointment.get("appointment_type", ""),
-                    appointment.get("status", ""),
-                    appointment.get("notes", "")[:50] + "..." if len(appointment.get("notes", "")) > 50 else appointment.get("notes", "")
-                ))
+            self.insert_rows(self.appointments_tree, rows, appointments)
                 
-        except Exception as e:
-            messagebox.showerror("Error", f"Error loading appointments: {str(e)}")
+        except Exception:
+            logger.exception("Error loading appointments")
+            self.status_var.set("Error loading appointments; see log for details")
     
     def load_patient_opd_visits(self):
         """Load patient OPD visits"""
@@ -597,34 +884,34 @@ class PatientDetails:
         
         try:
             # Clear existing items
-            for item in self.opd_visits_tree.get_children():
-                self.opd_visits_tree.delete(item)
+            children = self.opd_visits_tree.get_children()
+            if children:
+                self.opd_visits_tree.delete(*children)
             
-            # Get visits
-            visits = self.opd_manager.get_visits_by_patient(self.current_patient['id'])
-            
-            # Apply filter
+            # Apply filter to the fetched visits (newest first)
+            visits = self._visits
             filter_status = self.visit_filter_var.get()
             if filter_status != "All":
                 visits = [visit for visit in visits if visit.get('status') == filter_status]
             
-            # Sort by date (newest first)
-            visits.sort(key=lambda x: f"{x.get('visit_date', '')} {x.get('visit_time', '')}", reverse=True)
+            # Build all rows first, then insert them
+            doctor_name = self._doctor_name
+            rows = [(
+                visit.get("id", ""),
+                visit.get("visit_date", ""),
+                visit.get("visit_time", ""),
+                doctor_name(visit),
+                visit.get("visit_type", ""),
+                visit.get("priority", ""),
+                visit.get("status", ""),
+                _trunc(visit.get("chief_complaint", ""))
+            ) for visit in visits]
             
-            for visit in visits:
-                self.opd_visits_tree.insert("", tk.END, values=(
-                    visit.get("id", ""),
-                    visit.get("visit_date", ""),
-                    visit.get("visit_time", ""),
-                    visit.get("doctor_name", visit.get("doctor_id", "")),
-                    visit.get("visit_type", ""),
-                    visit.get("priority", ""),
-                    visit.get("status", ""),
-                    visit.get("chief_complaint", "")[:50] + "..." if len(visit.get("chief_complaint", "")) > 50 else visit.get("chief_complaint", "")
-                ))
+            self.insert_rows(self.opd_visits_tree, rows, visits)
                 
-        except Exception as e:
-            messagebox.showerror("Error", f"Error loading OPD visits: {str(e)}")
+        except Exception:
+            logger.exception("Error loading OPD visits")
+            self.status_var.set("Error loading OPD visits; see log for details")
     
     def load_medical_history(self):
         """Load medical history from OPD visits"""
@@ -633,30 +920,29 @@ class PatientDetails:
         
         try:
             # Clear existing items
-            for item in self.medical_history_tree.get_children():
-                self.medical_history_tree.delete(item)
+            children = self.medical_history_tree.get_children()
+            if children:
+                self.medical_history_tree.delete(*children)
             
-            # Get visits with medical information
-            visits = self.opd_manager.get_visits_by_patient(self.current_patient['id'])
+            # Filter fetched visits (newest first) with medical data
+            medical_visits = [v for v in self._visits if v.get('diagnosis') or v.get('treatment') or v.get('prescription')]
             
-            # Filter visits with medical data
-            medical_visits = [v for v in visits if v.get('diagnosis') or v.get('treatment') or v.get('prescription')]
+            # Build all rows first, then insert them
+            doctor_name = self._doctor_name
+            rows = [(
+                visit.get("visit_date", ""),
+                doctor_name(visit),
+                _trunc(visit.get("diagnosis", ""), 100),
+                _trunc(visit.get("treatment", ""), 100),
+                _trunc(visit.get("prescription", ""), 100),
+                _trunc(visit.get("notes", ""), 100)
+            ) for visit in medical_visits]
             
-            # Sort by date (newest first)
-            medical_visits.sort(key=lambda x: f"{x.get('visit_date', '')} {x.get('visit_time', '')}", reverse=True)
-            
-            for visit in medical_visits:
-                self.medical_history_tree.insert("", tk.END, values=(
-                    visit.get("visit_date", ""),
-                    visit.get("doctor_name", visit.get("doctor_id", "")),
-                    visit.get("diagnosis", "")[:100] + "..." if len(visit.get("diagnosis", "")) > 100 else visit.get("diagnosis", ""),
-                    visit.get("treatment", "")[:100] + "..." if len(visit.get("treatment", "")) > 100 else visit.get("treatment", ""),
-                    visit.get("prescription", "")[:100] + "..." if len(visit.get("prescription", "")) > 100 else visit.get("prescription", ""),
-                    visit.get("notes", "")[:100] + "..." if len(visit.get("notes", "")) > 100 else visit.get("notes", "")
-                ))
+            self.insert_rows(self.medical_history_tree, rows, medical_visits)
                 
-        except Exception as e:
-            messagebox.showerror("Error", f"Error loading medical history: {str(e)}")
+        except Exception:
+            logger.exception("Error loading medical history")
+            self.status_var.set("Error loading medical history; see log for details")
     
     def load_payment_history(self):
         """Load payment history"""
@@ -665,60 +951,81 @@ class PatientDetails:
         
         try:
             # Clear existing items
-            for item in self.payment_tree.get_children():
-                self.payment_tree.delete(item)
-            
-            # Get payments from OPD visits and appointments
-            visits = self.opd_manager.get_visits_by_patient(self.current_patient['id'])
-            appointments = self.appointment_manager.get_appointments_by_patient(self.current_patient['id'])
+            children = self.payment_tree.get_children()
+            if children:
+                self.payment_tree.delete(*children)
             
-            payments = []
+            # Build payment rows and the total in one pass over the fetched
+            # OPD visits; rows follow the visits, so they are newest first
+            rows = []
             total_paid = 0
             
-            # Extract payments from visits
-            for visit in visits:
+            for visit in self._visits:
                 payment_amount = visit.get('payment_amount', '')
                 if payment_amount:
                     try:
                         amount = float(payment_amount)
-                        total_paid += amount
-                        payments.append({
-                            'date': visit.get('visit_date', ''),
-                            'type': f"OPD Visit ({visit.get('id', '')})",
-                            'service': visit.get('visit_type', 'OPD Consultation'),
-                            'amount': f"₹{amount:.2f}",
-                            'method': 'Cash',  # Default
-                            'status': 'Paid'
-                        })
                     except ValueError:
-                        pass
-            
-            # Sort payments by date (newest first)
-            payments.sort(key=lambda x: x.get('date', ''), reverse=True)
+                        continue
+                    total_paid += amount
+                    rows.append((
+                        visit.get('visit_date', ''),
+                        f"OPD Visit ({visit.get('id', '')})",
+                        visit.get('visit_type', 'OPD Consultation'),
+                        f"₹{amount:.2f}",
+                        'Cash',  # Default
+                        'Paid'
+                    ))
             
             # Update payment summary
             self.total_payments_var.set(f"₹{total_paid:.2f}")
             self.pending_payments_var.set("₹0.00")  # Would need to calculate based on pending appointments
             
-            if payments:
-                latest_payment = max(payments, key=lambda x: x.get('date', ''))
-                self.last_payment_var.set(latest_payment.get('date', 'Never'))
+            if rows:
+                self.last_payment_var.set(rows[0][0])
             else:
                 self.last_payment_var.set("Never")
             
             # Populate payment tree
-            for payment in payments:
-                self.payment_tree.insert("", tk.END, values=(
-                    payment.get("date", ""),
-                    payment.get("type", ""),
-                    payment.get("service", ""),
-                    payment.get("amount", ""),
-                    payment.get("method", ""),
-                    payment.get("status", "")
-                ))
+            self.insert_rows(self.payment_tree, rows)
                 
-        except Exception as e:
-            messagebox.showerror("Error", f"Error loading payment history: {str(e)}")
+        except Exception:
+            logger.exception("Error loading payment history")
+            self.status_var.set("Error loading payment history; see log for details")
+    
+    def insert_rows(self, tree, rows, records=None):
+        """Insert rows into a tree a chunk at a time between idle callbacks; records, if given, are kept per row"""
+        token = self._insert_tokens.get(str(tree), 0) + 1
+        self._insert_tokens[str(tree)] = token
+        iids = None
+        if records is not None:
+            iids = _row_iids(records)
+            self._row_records[str(tree)] = dict(zip(iids, records))
+        self._insert_chunk(tree, rows, iids, 0, token)
+    
+    def _selected_record(self, tree):
+        """Record shown in a tree's first selected row, None if nothing is selected"""
+        selection = tree.selection()
+        if not selection:
+            return None
+        return self._row_records.get(str(tree), {}).get(selection[0])
+    
+    def _insert_chunk(self, tree, rows, iids, start, token):
+        """Insert one chunk of rows and schedule the next"""
+        # The tree has been cleared for a newer load, or closed
+        if self._insert_tokens.get(str(tree)) != token or not tree.winfo_exists():
+            return
+        
+        end = start + _INSERT_CHUNK_SIZE
+        try:
+            _insert_rows(tree, rows[start:end], iids[start:end] if iids is not None else None)
+        except tk.TclError:
+            # Later chunks run from idle callbacks, so report here rather than in the loader
+            logger.exception("Error inserting rows")
+            self.status_var.set("Error loading records; see log for details")
+            return
+        if end < len(rows):
+            self.window.after_idle(self._insert_chunk, tree, rows, iids, end, token)
     
     def update_patient_statistics(self):
         """Update patient statistics"""
@@ -726,35 +1033,25 @@ class PatientDetails:
             return
         
         try:
-            # Get statistics
-            appointments = self.appointment_manager.get_appointments_by_patient(self.current_patient['id'])
-            visits = self.opd_manager.get_visits_by_patient(self.current_patient['id'])
+            # Get statistics from the fetched records
+            appointments = self._appointments
+            visits = self._visits
             
             # Update counts
             self.total_appointments_var.set(str(len(appointments)))
             self.total_visits_var.set(str(len(visits)))
             
-            # Find last visit
-            all_visits = visits + appointments
-            if all_visits:
-                # Sort by date
-                dated_visits = []
-                for visit in all_visits:
-                    visit_date = visit.get('visit_date') or visit.get('appointment_date')
-                    if visit_date:
-                        dated_visits.append((visit_date, visit))
+            # Both lists are newest first, so the last visit is the later of their first dates
+            latest_dates = []
+            if visits and visits[0].get('visit_date'):
+                latest_dates.append(visits[0]['visit_date'])
+            if appointments and appointments[0].get('appointment_date'):
+                latest_dates.append(appointments[0]['appointment_date'])
+            self.last_visit_var.set(max(latest_dates) if latest_dates else "Never")
                 
-                if dated_visits:
-                    dated_visits.sort(key=lambda x: x[0], reverse=True)
-                    last_visit_date = dated_visits[0][0]
-                    self.last_visit_var.set(last_visit_date)
-                else:
-                    self.last_visit_var.set("Never")
-            else:
-                self.last_visit_var.set("Never")
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Error updating statistics: {str(e)}")
+        except Exception:
+            logger.exception("Error updating statistics")
+            self.status_var.set("Error updating statistics; see log for details")
     
     def filter_appointments(self, event=None):
         """Filter appointments by status"""
@@ -766,61 +1063,57 @@ class PatientDetails:
     
     def show_appointment_details(self, event):
         """Show appointment details"""
-        selection = self.appointments_tree.selection()
-        if not selection:
-            return
-        
-        item = self.appointments_tree.item(selection[0])
-        appointment_id = item['values'][0]
-        
-        # Find appointment details
-        appointments = self.appointment_manager.get_all_appointments()
-        appointment = next((a for a in appointments if a.get('id') == appointment_id), None)
-        
+        appointment = self._selected_record(self.appointments_tree)
         if appointment:
             self.show_details_window("Appointment Details", appointment, "appointment")
     
     def show_opd_visit_details(self, event):
         """Show OPD visit details"""
-        selection = self.opd_visits_tree.selection()
-        if not selection:
-            return
-        
-        item = self.opd_visits_tree.item(selection[0])
-        visit_id = item['values'][0]
-        
-        # Find visit details
-        visits = self.opd_manager.get_all_visits()
-        visit = next((v for v in visits if v.get('id') == visit_id), None)
-        
+        visit = self._selected_record(self.opd_visits_tree)
         if visit:
             self.show_details_window("OPD Visit Details", visit, "opd_visit")
     
     def show_medical_record_details(self, event):
         """Show medical record details"""
-        selection = self.medical_history_tree.selection()
-        if not selection:
-            return
-        
-        item = self.medical_history_tree.item(selection[0])
-        visit_date = item['values'][0]
-        doctor_name = item['values'][1]
-        
-        # Find the corresponding visit
-        visits = self.opd_manager.get_visits_by_patient(self.current_patient['id'])
-        visit = next((v for v in visits if v.get('visit_date') == visit_date and 
-                     v.get('doctor_name') == doctor_name), None)
-        
+        visit = self._selected_record(self.medical_history_tree)
         if visit:
             self.show_details_window("Medical Record Details", visit, "medical_record")
     
     def show_details_window(self, title, data, data_type):
-        """Show details in a separate window"""
+        """Show details in a separate window, reusing the window built for the data type"""
+        if data_type not in self._details_windows:
+            self._details_windows[data_type] = self._build_details_window(title, data_type)
+        details_window, value_widgets = self._details_windows[data_type]
+        
+        for field_name, (value_label, text_widget) in value_widgets.items():
+            value = str(data.get(field_name, "N/A"))
+            if text_widget is not None and len(value) > 50:
+                # Use text widget for long text
+                text_widget.config(state=tk.NORMAL)
+                text_widget.delete("1.0", tk.END)
+                text_widget.insert("1.0", value)
+                text_widget.config(state=tk.DISABLED)
+                value_label.grid_remove()
+                text_widget.grid()
+            else:
+                # Use label for short text
+                value_label.config(text=value)
+                if text_widget is not None:
+                    text_widget.grid_remove()
+                value_label.grid()
+        
+        details_window.deiconify()
+        details_window.lift()
+        details_window.grab_set()
+    
+    def _build_details_window(self, title, data_type):
+        """Build a hidden details window for a data type; returns it and its value widgets"""
         details_window = tk.Toplevel(self.window)
+        details_window.withdraw()
         details_window.title(title)
         details_window.geometry("600x700")
         details_window.transient(self.window)
-        details_window.grab_set()
+        details_window.protocol("WM_DELETE_WINDOW", lambda: self._hide_details_window(details_window))
         
         # Center the window
         details_window.update_idletasks()
@@ -891,32 +1184,38 @@ class PatientDetails:
                 ("Notes", "notes")
             ]
         
+        # Value label for each field, plus a text widget for fields that may be long
+        value_widgets = {}
         row = 0
         for label_text, field_name in fields:
             ttk.Label(details_frame, text=f"{label_text}:", 
-                     font=('Arial', 10, 'bold')).grid(row=row, column=0, sticky=tk.NW, pady=5, padx=(0, 20))
+                     font=_BOLD_FONT).grid(row=row, column=0, sticky=tk.NW, pady=5, padx=(0, 20))
             
-            value = data.get(field_name, "N/A")
-            if field_name in ["notes", "chief_complaint", "diagnosis", "treatment", "prescription"] and len(str(value)) > 50:
-                # Use text widget for long text
+            value_label = ttk.Label(details_frame, wraplength=400)
+            value_label.grid(row=row, column=1, sticky=tk.W, pady=5)
+            text_widget = None
+            if field_name in ["notes", "chief_complaint", "diagnosis", "treatment", "prescription"]:
                 text_widget = tk.Text(details_frame, height=4, width=50, wrap=tk.WORD)
-                text_widget.insert("1.0", str(value))
-                text_widget.config(state=tk.DISABLED)
                 text_widget.grid(row=row, column=1, sticky=tk.W, pady=5)
-            else:
-                # Use label for short text
-                value_label = ttk.Label(details_frame, text=str(value), wraplength=400)
-                value_label.grid(row=row, column=1, sticky=tk.W, pady=5)
+                text_widget.grid_remove()
+            value_widgets[field_name] = (value_label, text_widget)
             
             row += 1
         
         # Close button
         ttk.Button(details_frame, text="Close", 
-                  command=details_window.destroy).grid(row=row, column=0, columnspan=2, pady=20)
+                  command=lambda: self._hide_details_window(details_window)).grid(row=row, column=0, columnspan=2, pady=20)
         
         # Pack canvas and scrollbar
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
+        
+        return details_window, value_widgets
+    
+    def _hide_details_window(self, details_window):
+        """Hide a details window so it can be shown again for the next record"""
+        details_window.grab_release()
+        details_window.withdraw()
     
     def generate_patient_pdf(self):
         """Generate PDF for selected patient"""
@@ -925,7 +1224,28 @@ class PatientDetails:
             return
         
         try:
-            filepath = self.pdf_generator.generate_patient_summary(self.current_patient['id'])
+            future = self._pdf_executor.submit(_render_patient_pdf, self.current_patient['id'])
+            self._pending_io += 1
+            self.window.config(cursor="watch")
+            self.window.after(_IO_POLL_MS, self._check_pdf, future)
+            
+        except Exception as e:
+            messagebox.showerror("Error", f"Error generating PDF: {str(e)}")
+    
+    def _check_pdf(self, future):
+        """Poll a PDF render and report the result once it finishes"""
+        if not self.window.winfo_exists():
+            return
+        if not future.done():
+            self.window.after(_IO_POLL_MS, self._check_pdf, future)
+            return
+        
+        self._pending_io -= 1
+        if not self._pending_io:
+            self.window.config(cursor="")
+        
+        try:
+            filepath = future.result()
             messagebox.showinfo("Success", f"Patient PDF generated successfully!\n\nFile: {os.path.basename(filepath)}")
             
         except Exception as e:
@@ -6,18 +6,58 @@ Handles patient registration, editing, and management operations
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import re
 
 from utils.file_io import PatientManager
-from utils.pdf_generator import PDFGenerator
+
+# Characters allowed in a phone number
+_PHONE_RE = re.compile(r'^[\d\s\-\+\(\)]+$')
+
+# Delay before a patient search runs, so a burst of keystrokes triggers one search
+_SEARCH_DELAY_MS = 250
+
+# How often a pending background load is checked for completion
+_IO_POLL_MS = 30
+
+# Patient list rows are inserted in batches of this size as the list is scrolled
+_PATIENT_BATCH_SIZE = 100
+
+# Fraction of the inserted rows scrolled past before the next batch is inserted
+_PATIENT_PREFETCH_AT = 0.9
+
+# Tcl lambda that inserts a list of value lists at the end of a tree, so a
+# batch of rows crosses from Python to Tcl in one call
+_INSERT_ROWS_TCL = "{tree rows} {foreach row $rows {$tree insert {} end -values $row}}"
+
+def _insert_rows(tree, rows):
+    """Append rows of column values to a Treeview in a single Tcl call"""
+    tree.tk.call("apply", _INSERT_ROWS_TCL, str(tree), tuple(rows))
 
 class PatientForm:
     def __init__(self, parent, quick_mode=False):
         self.parent = parent
         self.patient_manager = PatientManager()
-        self.pdf_generator = PDFGenerator()
+        # Created on first use, since the PDF libraries are slow to import
+        self.pdf_generator = None
         self.quick_mode = quick_mode
         self.current_patient_id = None
+        # Patients in the list; rows are built only for the scrolled-to ones
+        self._shown_patients = []
+        self._rendered_patient_count = 0
+        self._render_pending = False
+        # IDs of the patients last shown, to skip re-showing an unchanged search result
+        self._shown_patient_ids = None
+        # All patients as last loaded, with their lowercase name/ID/phone search keys
+        self._all_patients_cache = []
+        self._search_keys = []
+        self._search_after_id = None
+        # Patients load off the Tk thread; the lock keeps a load from
+        # reading the patients file while it is being written
+        self._io_executor = ThreadPoolExecutor(max_workers=1)
+        self._data_lock = threading.Lock()
+        self._load_token = 0
         
         self.create_window()
         self.setup_ui()
@@ -30,6 +70,7 @@ class PatientForm:
         self.window.geometry("1000x700")
         self.window.transient(self.parent)
         self.window.grab_set()
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Center the window
         self.window.update_idletasks()
@@ -76,6 +117,9 @@ class PatientForm:
         ]
         
         self.form_vars = {}
+        # Form fields by kind, so reading and filling the form needs no type checks
+        self._stringvar_fields = []
+        self._text_fields = []
         row = 0
         
         for label_text, field_name in fields:
@@ -89,16 +133,17 @@ class PatientForm:
                 gender_combo.grid(row=row, column=1, sticky=tk.W, pady=5)
             elif field_name in ["medical_history", "address"]:
                 # Text area for longer text
-                self.form_vars[field_name] = tk.StringVar()
                 text_widget = tk.Text(form_frame, height=3, width=32)
                 text_widget.grid(row=row, column=1, sticky=tk.W, pady=5)
-                self.form_vars[f"{field_name}_widget"] = text_widget
+                self._text_fields.append((field_name, text_widget))
             else:
                 # Regular entry
                 self.form_vars[field_name] = tk.StringVar()
                 entry = ttk.Entry(form_frame, textvariable=self.form_vars[field_name], width=32)
                 entry.grid(row=row, column=1, sticky=tk.W, pady=5)
             
+            if field_name in self.form_vars:
+                self._stringvar_fields.append((field_name, self.form_vars[field_name]))
             row += 1
         
         # Buttons frame
@@ -116,7 +161,7 @@ class PatientForm:
                       command=self.clear_form).pack(side=tk.LEFT, padx=5)
         
         ttk.Button(buttons_frame, text="Close", 
-                  command=self.window.destroy).pack(side=tk.LEFT, padx=5)
+                  command=self.on_close).pack(side=tk.LEFT, padx=5)
     
     def create_patient_list(self, parent):
         """Create patient list with search functionality"""
@@ -129,13 +174,16 @@ class PatientForm:
         
         ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT, padx=(0, 5))
         self.search_var = tk.StringVar()
-        self.search_var.trace('w', self.on_search)
         search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=30)
         search_entry.pack(side=tk.LEFT, padx=(0, 10))
+        search_entry.bind("<KeyRelease>", self.on_search)
         
         ttk.Button(search_frame, text="Clear Search", 
                   command=self.clear_search).pack(side=tk.LEFT, padx=5)
         
+        self.loading_var = tk.StringVar()
+        ttk.Label(search_frame, textvariable=self.loading_var, foreground='gray').pack(side=tk.LEFT, padx=5)
+        
         # Patient list
         list_container = ttk.Frame(list_frame)
         list_container.pack(fill=tk.BOTH, expand=True)
@@ -150,13 +198,13 @@ class PatientForm:
             self.patient_tree.column(col, width=120)
         
         # Scrollbars
-        v_scrollbar = ttk.Scrollbar(list_container, orient=tk.VERTICAL, command=self.patient_tree.yview)
+        self.patient_scrollbar = ttk.Scrollbar(list_container, orient=tk.VERTICAL, command=self.patient_tree.yview)
         h_scrollbar = ttk.Scrollbar(list_container, orient=tk.HORIZONTAL, command=self.patient_tree.xview)
-        self.patient_tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.patient_tree.configure(yscrollcommand=self.on_patient_scroll, xscrollcommand=h_scrollbar.set)
         
         # Pack treeview and scrollbars
         self.patient_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.patient_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
         
         # Bind events
@@ -177,59 +225,49 @@ class PatientForm:
                   command=self.load_patients).pack(side=tk.LEFT, padx=5)
     
     def validate_form(self):
-        """Validate form data"""
+        """Validate form data, reporting every problem at once"""
         required_fields = ["name", "age", "gender", "phone"]
+        errors = []
         
         for field in required_fields:
             if field in self.form_vars:
                 value = self.form_vars[field].get().strip()
                 if not value:
-                    messagebox.showerror("Validation Error", f"{field.title()} is required!")
-                    return False
+                    errors.append(f"{field.title()} is required!")
         
         # Validate age
-        try:
-            age = int(self.form_vars["age"].get().strip())
-            if age < 0 or age > 150:
-                messagebox.showerror("Validation Error", "Age must be between 0 and 150!")
-                return False
-        except ValueError:
-            messagebox.showerror("Validation Error", "Age must be a valid number!")
-            return False
+        age = self.form_vars["age"].get().strip()
+        if age:
+            if not age.isdecimal():
+                errors.append("Age must be a valid number!")
+            elif int(age) > 150:
+                errors.append("Age must be between 0 and 150!")
         
         # Validate phone
         phone = self.form_vars["phone"].get().strip()
-        if not re.match(r'^[\d\s\-\+\(\)]+$', phone):
-            messagebox.showerror("Validation Error", "Phone number contains invalid characters!")
+        if phone and not _PHONE_RE.match(phone):
+            errors.append("Phone number contains invalid characters!")
+        
+        if errors:
+            messagebox.showerror("Validation Error", "\n".join(errors))
             return False
         
         return True
     
     def get_form_data(self):
         """Get data from form fields"""
-        data = {}
-        
-        for field_name, var in self.form_vars.items():
-            if field_name.endswith("_widget"):
-                # Handle text widgets
-                widget = var
-                content = widget.get("1.0", tk.END).strip()
-                field_name = field_name.replace("_widget", "")
-                data[field_name] = content
-            elif isinstance(var, tk.StringVar):
-                data[field_name] = var.get().strip()
+        data = {field_name: var.get().strip() for field_name, var in self._stringvar_fields}
+        for field_name, widget in self._text_fields:
+            data[field_name] = widget.get("1.0", tk.END).strip()
         
         return data
     
     def clear_form(self):
         """Clear all form fields"""
-        for field_name, var in self.form_vars.items():
-            if field_name.endswith("_widget"):
-                # Handle text widgets
-                widget = var
-                widget.delete("1.0", tk.END)
-            elif isinstance(var, tk.StringVar):
-                var.set("")
+        for field_name, var in self._stringvar_fields:
+            var.set("")
+        for field_name, widget in self._text_fields:
+            widget.delete("1.0", tk.END)
         
         self.current_patient_id = None
     
@@ -241,13 +279,16 @@ class PatientForm:
         try:
             patient_data = self.get_form_data()
             
-            if self.patient_manager.add_patient(patient_data):
+            with self._data_lock:
+                added = self.patient_manager.add_patient(patient_data)
+            
+            if added:
                 messagebox.showinfo("Success", "Patient added successfully!")
                 self.clear_form()
                 if not self.quick_mode:
                     self.load_patients()
                 else:
-                    self.window.destroy()
+                    self.on_close()
             else:
                 messagebox.showerror("Error", "Failed to add patient!")
                 
@@ -266,7 +307,10 @@ class PatientForm:
         try:
             patient_data = self.get_form_data()
             
-            if self.patient_manager.update_patient(self.current_patient_id, patient_data):
+            with self._data_lock:
+                updated = self.patient_manager.update_patient(self.current_patient_id, patient_data)
+            
+            if updated:
                 messagebox.showinfo("Success", "Patient updated successfully!")
                 self.clear_form()
                 self.load_patients()
@@ -277,66 +321,127 @@ class PatientForm:
             messagebox.showerror("Error", f"Error updating patient: {str(e)}")
     
     def load_patients(self):
-        """Load patients into the list"""
+        """Load patients into the list off the Tk thread"""
         if self.quick_mode:
             return
         
+        self._load_token += 1
+        future = self._io_executor.submit(self.fetch_patients)
+        self.loading_var.set("Loading...")
+        self.window.after(_IO_POLL_MS, self._check_patients, future, self._load_token)
+    
+    def fetch_patients(self):
+        """Fetch all patients; runs on the I/O thread"""
+        with self._data_lock:
+            return self.patient_manager.get_all_patients()
+    
+    def _check_patients(self, future, token):
+        """Poll the patient load and show the patients once it finishes"""
+        if not self.window.winfo_exists():
+            return
+        if not future.done():
+            self.window.after(_IO_POLL_MS, self._check_patients, future, token)
+            return
+        
+        # A newer load has been requested since this one started
+        if token != self._load_token:
+            return
+        self.loading_var.set("")
+        
         try:
-            # Clear existing items
-            for item in self.patient_tree.get_children():
-                self.patient_tree.delete(item)
-            
-            # Load patients
-            patients = self.patient_manager.get_all_patients()
-            
-            for patient in patients:
-                self.patient_tree.insert("", tk.END, values=(
-                    patient.get("id", ""),
-                    patient.get("name", ""),
-                    patient.get("age", ""),
-                    patient.get("gender", ""),
-                    patient.get("phone", ""),
-                    patient.get("registration_date", "")
-                ))
+            # Show patients, keeping them for searches
+            patients = future.result()
+            self._all_patients_cache = patients
+            self._search_keys = [
+                f"{p.get('name', '')}\0{p.get('id', '')}\0{p.get('phone', '')}".lower()
+                for p in patients
+            ]
+            self.show_patients(patients, force=True)
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error loading patients: {str(e)}")
     
+    def show_patients(self, patients, force=False):
+        """Show patients in the list, inserting rows as they scroll into view"""
+        # A search that matches the same patients leaves the list as it is;
+        # a reload always re-shows, since patient details may have changed
+        patient_ids = tuple(patient.get("id") for patient in patients)
+        if not force and patient_ids == self._shown_patient_ids:
+            return
+        self._shown_patient_ids = patient_ids
+        
+        # Clear existing items
+        children = self.patient_tree.get_children()
+        if children:
+            self.patient_tree.delete(*children)
+        
+        self._shown_patients = patients
+        self._rendered_patient_count = 0
+        self.render_more_patients()
+    
+    def render_more_patients(self):
+        """Insert the next batch of patient rows into the list"""
+        self._render_pending = False
+        start = self._rendered_patient_count
+        end = min(start + _PATIENT_BATCH_SIZE, len(self._shown_patients))
+        _insert_rows(self.patient_tree, ((
+            patient.get("id", ""),
+            patient.get("name", ""),
+            patient.get("age", ""),
+            patient.get("gender", ""),
+            patient.get("phone", ""),
+            patient.get("registration_date", "")
+        ) for patient in self._shown_patients[start:end]))
+        self._rendered_patient_count = end
+    
+    def on_patient_scroll(self, first, last):
+        """Update the scrollbar and insert more rows when the end of the list is near"""
+        self.patient_scrollbar.set(first, last)
+        if (not self._render_pending
+                and self._rendered_patient_count < len(self._shown_patients)
+                and float(last) >= _PATIENT_PREFETCH_AT):
+            self._render_pending = True
+            self.window.after_idle(self.render_more_patients)
+    
+    def on_close(self):
+        """Stop background loads and close the window"""
+        self._io_executor.shutdown(wait=False)
+        self.window.destroy()
+    
     def on_search(self, *args):
-        """Handle search functionality"""
+        """Handle search functionality, waiting for typing to pause"""
         if self.quick_mode:
             return
         
-        search_query = self.search_var.get().strip()
+        if self._search_after_id:
+            self.window.after_cancel(self._search_after_id)
+        self._search_after_id = self.window.after(_SEARCH_DELAY_MS, self._do_search)
+    
+    def _do_search(self):
+        """Filter the loaded patients by the current query"""
+        self._search_after_id = None
+        search_query = self.search_var.get().strip().lower()
         
         try:
-            # Clear existing items
-            for item in self.patient_tree.get_children():
-                self.patient_tree.delete(item)
-            
-            # Search patients
+            # Search the patients loaded by load_patients
             if search_query:
-                patients = self.patient_manager.search_patients(search_query)
+                patients = [patient for patient, key in zip(self._all_patients_cache, self._search_keys)
+                            if search_query in key]
             else:
-                patients = self.patient_manager.get_all_patients()
+                patients = self._all_patients_cache
             
             # Populate tree
-            for patient in patients:
-                self.patient_tree.insert("", tk.END, values=(
-                    patient.get("id", ""),
-                    patient.get("name", ""),
-                    patient.get("age", ""),
-                    patient.get("gender", ""),
-                    patient.get("phone", ""),
-                    patient.get("registration_date", "")
-                ))
+            self.show_patients(patients)
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error searching patients: {str(e)}")
     
     def clear_search(self):
         """Clear search and reload all patients"""
+        if self._search_after_id:
+            self.window.after_cancel(self._search_after_id)
         self.search_var.set("")
+        self._do_search()
     
     def on_patient_select(self, event):
         """Handle patient selection"""
@@ -354,15 +459,11 @@ class PatientForm:
                 self.current_patient_id = patient_id
                 
                 # Fill form with patient data
-                for field_name, var in self.form_vars.items():
-                    if field_name.endswith("_widget"):
-                        # Handle text widgets
-                        widget = var
-                        field_name = field_name.replace("_widget", "")
-                        widget.delete("1.0", tk.END)
-                        widget.insert("1.0", patient.get(field_name, ""))
-                    elif isinstance(var, tk.StringVar):
-                        var.set(patient.get(field_name, ""))
+                for field_name, var in self._stringvar_fields:
+                    var.set(patient.get(field_name, ""))
+                for field_name, widget in self._text_fields:
+                    widget.delete("1.0", tk.END)
+                    widget.insert("1.0", patient.get(field_name, ""))
                         
         except Exception as e:
             messagebox.showerror("Error", f"Error loading patient data: {str(e)}")
@@ -392,7 +493,10 @@ class PatientForm:
         if messagebox.askyesno("Confirm Delete", 
                               f"Are you sure you want to delete patient '{patient_name}' (ID: {patient_id})?\n\nThis action cannot be undone!"):
             try:
-                if self.patient_manager.delete_patient(patient_id):
+                with self._data_lock:
+                    deleted = self.patient_manager.delete_patient(patient_id)
+                
+                if deleted:
                     messagebox.showinfo("Success", "Patient deleted successfully!")
                     self.clear_form()
                     self.load_patients()
@@ -413,6 +517,9 @@ class PatientForm:
         patient_id = item['values'][0]
         
         try:
+            if self.pdf_generator is None:
+                from utils.pdf_generator import PDFGenerator
+                self.pdf_generator = PDFGenerator()
             filepath = self.pdf_generator.generate_patient_summary(patient_id)
             messagebox.showinfo("Success", f"Patient PDF generated successfully!\n\nFile: {filepath}")
             
@@ -4,13 +4,63 @@ Handles all data persistence operations using JSON files
 """
 
 import json
+import logging
+import mmap
 import os
+import shutil
+import tempfile
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+if orjson is not None:
+    def _dumps(data: List[Dict[str, Any]]) -> bytes:
+        """Serialize data as indented JSON; datetimes are passed to str() as json.dump does"""
+        return orjson.dumps(data, default=str, option=(
+            orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME))
+    
+    _loads = orjson.loads
+else:
+    def _dumps(data: List[Dict[str, Any]]) -> bytes:
+        """Serialize data as indented JSON"""
+        return json.dumps(data, indent=2, ensure_ascii=False, default=str).encode('utf-8')
+    
+    _loads = json.loads
+
+# Data files at least this large are parsed straight from a memory map
+_MMAP_MIN_SIZE = 64 * 1024
+
+def _load_file(file_path: str, size: int) -> Any:
+    """Parse a JSON file, mapping large files instead of copying them into memory"""
+    with open(file_path, 'rb') as file:
+        # json.loads can't take a buffer, so only orjson benefits from the map
+        if orjson is None or size < _MMAP_MIN_SIZE:
+            return _loads(file.read())
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                return orjson.loads(view)
+
+# Last ID issued per ID prefix, kept in the data directory
+_COUNTERS_FILE = "_counters.json"
+
 class FileIOManager:
     def __init__(self):
         self.data_dir = "data"
+        # Parsed data files by filename, with the file signature they were parsed at
+        self._cache = {}
+        # Saves held back by batch(), by filename, written when the outermost batch ends
+        self._batch_depth = 0
+        self._pending = {}
+        self._deferred_saves = 0
         self.ensure_data_directory()
     
     def ensure_data_directory(self):
@@ -18,33 +68,114 @@ class FileIOManager:
         os.makedirs(self.data_dir, exist_ok=True)
     
     def load_data(self, filename: str) -> List[Dict[str, Any]]:
-        """Load data from JSON file"""
+        """Load data from JSON file, re-parsing only when the file has changed"""
+        pending = self._pending.get(filename)
+        if pending is not None:
+            # A fresh container each time, as after a real save, so callers
+            # that index by list identity see the change
+            return pending.copy()
         try:
             file_path = os.path.join(self.data_dir, filename)
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    return json.load(file)
+            signature = self.file_signature(filename)
+            if signature is not None:
+                cached = self._cache.get(filename)
+                if cached is not None and cached[0] == signature:
+                    return cached[1]
+                data = _load_file(file_path, signature[1])
+                self._cache[filename] = (signature, data)
+                return data
             return []
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"Error loading data from {filename}: {e}")
+        except (json.JSONDecodeError, IOError):
+            logger.exception("Error loading data from %s", filename)
             return []
     
+    def file_signature(self, filename: str) -> Optional[tuple]:
+        """(mtime, size) of a data file, None if it doesn't exist"""
+        if filename in self._pending:
+            # The file is stale while a save is deferred, so count the saves instead
+            return ('pending', self._deferred_saves)
+        try:
+            stat = os.stat(os.path.join(self.data_dir, filename))
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+    
     def save_data(self, filename: str, data: List[Dict[str, Any]]) -> bool:
-        """Save data to JSON file"""
+        """Save data to JSON file, or queue it until the current batch() ends"""
+        if self._batch_depth:
+            self._pending[filename] = data
+            self._deferred_saves += 1
+            return True
+        return self._write_data(filename, data)
+    
+    @contextmanager
+    def batch(self):
+        """Hold back saves made inside the block and write each changed file once at the end"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            flushed = self._batch_depth or self.flush()
+        # Saves in the block already reported success, so a failed write must not pass silently
+        if not flushed:
+            raise IOError(f"Failed to write batched changes to {', '.join(self._pending)}")
+    
+    def flush(self) -> bool:
+        """Write any saves deferred by batch(), keeping the ones that fail queued for another try"""
+        pending, self._pending = self._pending, {}
+        for filename, data in pending.items():
+            if not self._write_data(filename, data):
+                self._pending[filename] = data
+        return not self._pending
+    
+    def _write_data(self, filename: str, data: List[Dict[str, Any]]) -> bool:
+        """Write data to its JSON file"""
+        # Callers save the list they loaded after changing it, so the cached
+        # copy may no longer match the file if the write fails
+        self._cache.pop(filename, None)
+        tmp_path = None
         try:
             file_path = os.path.join(self.data_dir, filename)
-            with open(file_path, 'w', encoding='utf-8') as file:
-                json.dump(data, file, indent=2, ensure_ascii=False, default=str)
+            # Write a uniquely named sibling file and swap it in, so readers never see
+            # a partial file and concurrent writers never share a temporary file
+            fd, tmp_path = tempfile.mkstemp(dir=self.data_dir, prefix=filename + ".", suffix=".tmp")
+            with os.fdopen(fd, 'wb') as file:
+                file.write(_dumps(data))
+                # Make sure the new contents are on disk before they replace the old file
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, file_path)
             return True
-        except IOError as e:
-            print(f"Error saving data to {filename}: {e}")
+        except IOError:
+            logger.exception("Error saving data to %s", filename)
+            # Don't leave a partial temporary file behind
+            if tmp_path:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
             return False
     
-    def generate_id(self, data: List[Dict[str, Any]], prefix: str = "") -> str:
-        """Generate unique ID for new records"""
-        if not data:
-            return f"{prefix}001"
-        
+    def next_id(self, data: List[Dict[str, Any]], prefix: str, existing_ids=None) -> str:
+        """Next ID for a prefix from a persisted counter, never one already in existing_ids (data's IDs if not given)"""
+        counters = self.load_data(_COUNTERS_FILE)
+        if not isinstance(counters, dict):
+            counters = {}
+        last_id = counters.get(prefix)
+        if last_id is None:
+            last_id = self._max_numeric_id(data, prefix)
+        if existing_ids is None:
+            existing_ids = {item.get('id') for item in data}
+        if f"{prefix}{last_id + 1:03d}" in existing_ids:
+            # The counter is behind the records, e.g. after a backup was restored
+            last_id = max(last_id, self._max_numeric_id(data, prefix))
+        counters[prefix] = last_id + 1
+        self.save_data(_COUNTERS_FILE, counters)
+        return f"{prefix}{last_id + 1:03d}"
+    
+    def _max_numeric_id(self, data: List[Dict[str, Any]], prefix: str) -> int:
+        """Largest numeric part of the IDs in data, 0 if there are none"""
         # Extract numeric part from existing IDs
         max_id = 0
         for item in data:
@@ -61,7 +192,7 @@ class FileIOManager:
                 except ValueError:
                     continue
         
-        return f"{prefix}{max_id + 1:03d}"
+        return max_id
     
     def backup_data(self, filename: str) -> bool:
         """Create backup of data file"""
@@ -72,39 +203,50 @@ class FileIOManager:
                 backup_filename = f"{filename.split('.')[0]}_backup_{timestamp}.json"
                 backup_path = os.path.join(self.data_dir, backup_filename)
                 
-                with open(source_path, 'r', encoding='utf-8') as source:
-                    with open(backup_path, 'w', encoding='utf-8') as backup:
-                        backup.write(source.read())
+                # copyfile lets the OS copy the bytes without reading them into Python
+                shutil.copyfile(source_path, backup_path)
                 return True
-        except IOError as e:
-            print(f"Error creating backup for {filename}: {e}")
+        except IOError:
+            logger.exception("Error creating backup for %s", filename)
         return False
 
 class PatientManager:
-    def __init__(self):
-        self.file_io = FileIOManager()
+    def __init__(self, file_io: Optional[FileIOManager] = None):
+        # Managers given the same FileIOManager share its parsed-file cache
+        self.file_io = file_io or FileIOManager()
         self.filename = "patients.json"
+        self._by_id = None
+        self._by_id_source = None
+        self._search_index = None
+        self._search_index_source = None
     
     def get_all_patients(self) -> List[Dict[str, Any]]:
         """Get all patients"""
         return self.file_io.load_data(self.filename)
     
+    def _id_index(self, patients: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Map patient ID to patient over a loaded patient list, rebuilt when the list is re-loaded"""
+        if self._by_id is None or self._by_id_source is not patients:
+            self._by_id = {patient['id']: patient for patient in patients}
+            self._by_id_source = patients
+        return self._by_id
+    
     def add_patient(self, patient_data: Dict[str, Any]) -> bool:
         """Add new patient"""
         patients = self.get_all_patients()
-        patient_data['id'] = self.file_io.generate_id(patients, "PAT")
-        patient_data['registration_date'] = datetime.now().strftime("%Y-%m-%d")
+        patient_data['id'] = self.file_io.next_id(patients, "PAT", self._id_index(patients))
+        patient_data['registration_date'] = datetime.now().date().isoformat()
         patients.append(patient_data)
         return self.file_io.save_data(self.filename, patients)
     
     def update_patient(self, patient_id: str, updated_data: Dict[str, Any]) -> bool:
         """Update existing patient"""
         patients = self.get_all_patients()
-        for i, patient in enumerate(patients):
-            if patient['id'] == patient_id:
-                patients[i].update(updated_data)
-                return self.file_io.save_data(self.filename, patients)
-        return False
+        patient = self._id_index(patients).get(patient_id)
+        if patient is None:
+            return False
+        patient.update(updated_data)
+        return self.file_io.save_data(self.filename, patients)
     
     def delete_patient(self, patient_id: str) -> bool:
         """Delete patient"""
@@ -114,51 +256,62 @@ class PatientManager:
     
     def search_patients(self, query: str) -> List[Dict[str, Any]]:
         """Search patients by name, ID, or phone"""
-        patients = self.get_all_patients()
         query = query.lower()
-        results = []
-        
-        for patient in patients:
-            if (query in patient.get('name', '').lower() or
-                query in patient.get('id', '').lower() or
-                query in patient.get('phone', '').lower()):
-                results.append(patient)
-        
-        return results
+        return [patient for patient, key in self._search_keys(self.get_all_patients()) if query in key]
+    
+    def _search_keys(self, patients: List[Dict[str, Any]]) -> List[tuple]:
+        """Pair each patient with its lowercased name, ID and phone, rebuilt when the list is re-loaded"""
+        if self._search_index is None or self._search_index_source is not patients:
+            # The NUL separator keeps a query from matching across two fields
+            self._search_index = [
+                (patient, "\0".join((patient.get('name', ''), patient.get('id', ''), patient.get('phone', ''))).lower())
+                for patient in patients
+            ]
+            self._search_index_source = patients
+        return self._search_index
     
     def get_patient_by_id(self, patient_id: str) -> Optional[Dict[str, Any]]:
         """Get patient by ID"""
-        patients = self.get_all_patients()
-        for patient in patients:
-            if patient['id'] == patient_id:
-                return patient
-        return None
+        return self._id_index(self.get_all_patients()).get(patient_id)
 
 class AppointmentManager:
-    def __init__(self):
-        self.file_io = FileIOManager()
+    def __init__(self, file_io: Optional[FileIOManager] = None):
+        # Managers given the same FileIOManager share its parsed-file cache
+        self.file_io = file_io or FileIOManager()
         self.filename = "appointments.json"
+        self._by_patient = None
+        self._by_date = None
+        self._buckets_signature = None
+        self._by_id = None
+        self._by_id_source = None
     
     def get_all_appointments(self) -> List[Dict[str, Any]]:
         """Get all appointments"""
         return self.file_io.load_data(self.filename)
     
+    def _id_index(self, appointments: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Map appointment ID to appointment over a loaded appointment list, rebuilt when the list is re-loaded"""
+        if self._by_id is None or self._by_id_source is not appointments:
+            self._by_id = {appointment['id']: appointment for appointment in appointments}
+            self._by_id_source = appointments
+        return self._by_id
+    
     def add_appointment(self, appointment_data: Dict[str, Any]) -> bool:
         """Add new appointment"""
         appointments = self.get_all_appointments()
-        appointment_data['id'] = self.file_io.generate_id(appointments, "APT")
-        appointment_data['created_date'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        appointment_data['id'] = self.file_io.next_id(appointments, "APT", self._id_index(appointments))
+        appointment_data['created_date'] = datetime.now().isoformat(' ', 'seconds')
         appointments.append(appointment_data)
         return self.file_io.save_data(self.filename, appointments)
     
     def update_appointment(self, appointment_id: str, updated_data: Dict[str, Any]) -> bool:
         """Update existing appointment"""
         appointments = self.get_all_appointments()
-        for i, appointment in enumerate(appointments):
-            if appointment['id'] == appointment_id:
-                appointments[i].update(updated_data)
-                return self.file_io.save_data(self.filename, appointments)
-        return False
+        appointment = self._id_index(appointments).get(appointment_id)
+        if appointment is None:
+            return False
+        appointment.update(updated_data)
+        return self.file_io.save_data(self.filename, appointments)
     
     def delete_appointment(self, appointment_id: str) -> bool:
         """Delete appointment"""
@@ -166,81 +319,316 @@ class AppointmentManager:
         appointments = [a for a in appointments if a['id'] != appointment_id]
         return self.file_io.save_data(self.filename, appointments)
     
+    def get_appointment_by_id(self, appointment_id: str) -> Optional[Dict[str, Any]]:
+        """Get appointment by ID"""
+        return self._id_index(self.get_all_appointments()).get(appointment_id)
+    
+    def _bucket_indexes(self) -> None:
+        """Group appointments by patient and by date, rebuilt when the appointments file changes"""
+        signature = self.file_io.file_signature(self.filename)
+        if self._by_patient is None or signature != self._buckets_signature:
+            by_patient = defaultdict(list)
+            by_date = defaultdict(list)
+            for appointment in self.get_all_appointments():
+                by_patient[appointment.get('patient_id')].append(appointment)
+                by_date[appointment.get('appointment_date')].append(appointment)
+            for appointments in by_patient.values():
+                appointments.sort(key=lambda a: (a.get('appointment_date', ''), a.get('appointment_time', '')))
+            self._by_patient = by_patient
+            self._by_date = by_date
+            self._buckets_signature = signature
+    
     def get_appointments_by_date(self, date: str) -> List[Dict[str, Any]]:
         """Get appointments for specific date"""
-        appointments = self.get_all_appointments()
-        return [a for a in appointments if a.get('appointment_date') == date]
+        self._bucket_indexes()
+        return list(self._by_date.get(date, []))
     
     def get_appointments_by_patient(self, patient_id: str) -> List[Dict[str, Any]]:
-        """Get appointments for specific patient"""
-        appointments = self.get_all_appointments()
-        return [a for a in appointments if a.get('patient_id') == patient_id]
+        """Get appointments for specific patient, oldest first"""
+        self._bucket_indexes()
+        return list(self._by_patient.get(patient_id, []))
 
 class DoctorManager:
-    def __init__(self):
-        self.file_io = FileIOManager()
+    def __init__(self, file_io: Optional[FileIOManager] = None):
+        # Managers given the same FileIOManager share its parsed-file cache
+        self.file_io = file_io or FileIOManager()
         self.filename = "doctors.json"
+        self._by_id = None
+        self._by_id_source = None
     
     def get_all_doctors(self) -> List[Dict[str, Any]]:
         """Get all doctors"""
         return self.file_io.load_data(self.filename)
     
+    def _id_index(self, doctors: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Map doctor ID to doctor over a loaded doctor list, rebuilt when the list is re-loaded"""
+        if self._by_id is None or self._by_id_source is not doctors:
+            self._by_id = {doctor['id']: doctor for doctor in doctors}
+            self._by_id_source = doctors
+        return self._by_id
+    
     def add_doctor(self, doctor_data: Dict[str, Any]) -> bool:
         """Add new doctor"""
         doctors = self.get_all_doctors()
-        doctor_data['id'] = self.file_io.generate_id(doctors, "DOC")
+        doctor_data['id'] = self.file_io.next_id(doctors, "DOC", self._id_index(doctors))
         doctors.append(doctor_data)
         return self.file_io.save_data(self.filename, doctors)
     
     def update_doctor(self, doctor_id: str, updated_data: Dict[str, Any]) -> bool:
         """Update existing doctor"""
         doctors = self.get_all_doctors()
-        for i, doctor in enumerate(doctors):
-            if doctor['id'] == doctor_id:
-                doctors[i].update(updated_data)
-                return self.file_io.save_data(self.filename, doctors)
-        return False
+        doctor = self._id_index(doctors).get(doctor_id)
+        if doctor is None:
+            return False
+        doctor.update(updated_data)
+        return self.file_io.save_data(self.filename, doctors)
     
     def delete_doctor(self, doctor_id: str) -> bool:
         """Delete doctor"""
         doctors = self.get_all_doctors()
         doctors = [d for d in doctors if d['id'] != doctor_id]
         return self.file_io.save_data(self.filename, doctors)
+    
+    def get_doctor_by_id(self, doctor_id: str) -> Optional[Dict[str, Any]]:
+        """Get doctor by ID"""
+        return self._id_index(self.get_all_doctors()).get(doctor_id)
+
+# Queue ordering rank for each visit priority
+_PRIORITY_RANK = {"Emergency": 1, "High": 2, "Normal": 3, "Low": 4}
 
 class OPDManager:
-    def __init__(self):
-        self.file_io = FileIOManager()
+    def __init__(self, file_io: Optional[FileIOManager] = None):
+        # Managers given the same FileIOManager share its parsed-file cache
+        self.file_io = file_io or FileIOManager()
         self.filename = "opd_visits.json"
+        self._visits_cache = None
+        self._cache_signature = None
+        # Bumped whenever cached visits change, for callers caching derived data
+        self.cache_version = 0
+        self._by_date = None
+        self._by_patient = None
+        self._by_status_date = None
+        self._search_blobs = None
+        self._by_id = None
+        self._waiting_queues = {}
+        self._dirty = False
+        # Visits may be loaded or saved from a background thread
+        self._lock = threading.RLock()
+    
+    def invalidate_cache(self):
+        """Drop cached visits so the next read goes to disk"""
+        with self._lock:
+            self._visits_cache = None
+            self._dirty = False
+            self._reset_indexes()
+    
+    def _reset_indexes(self):
+        """Drop lookup indexes so they are rebuilt from the cached visits"""
+        self.cache_version += 1
+        self._by_date = None
+        self._by_patient = None
+        self._by_status_date = None
+        self._search_blobs = None
+        self._by_id = None
+        self._waiting_queues = {}
+    
+    def _id_index(self, visits: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Map visit ID to visit over the cached visits"""
+        with self._lock:
+            if self._by_id is None:
+                self._by_id = {v.get('id'): v for v in visits}
+            return self._by_id
+    
+    def _save_visits(self, visits: List[Dict[str, Any]]) -> bool:
+        """Save visits and keep the cache in step with the file"""
+        with self._lock:
+            if self.file_io.save_data(self.filename, visits):
+                self._visits_cache = visits
+                self._cache_signature = self.file_io.file_signature(self.filename)
+                self._dirty = False
+                return True
+            self.invalidate_cache()
+            return False
     
     def get_all_visits(self) -> List[Dict[str, Any]]:
-        """Get all OPD visits"""
-        return self.file_io.load_data(self.filename)
+        """Get all OPD visits, cached until the visits file changes"""
+        with self._lock:
+            if self._dirty:
+                # Deferred changes only exist in memory until flush()
+                return self._visits_cache
+            
+            signature = self.file_io.file_signature(self.filename)
+            if self._visits_cache is None or signature != self._cache_signature:
+                self._visits_cache = self.file_io.load_data(self.filename)
+                self._cache_signature = signature
+                self._reset_indexes()
+            return self._visits_cache
     
     def add_visit(self, visit_data: Dict[str, Any]) -> bool:
         """Add new OPD visit"""
-        visits = self.get_all_visits()
-        visit_data['id'] = self.file_io.generate_id(visits, "OPD")
-        visit_data['visit_date'] = datetime.now().strftime("%Y-%m-%d")
-        visit_data['visit_time'] = datetime.now().strftime("%H:%M:%S")
-        visits.append(visit_data)
-        return self.file_io.save_data(self.filename, visits)
+        with self._lock:
+            visits = self.get_all_visits()
+            visit_data['id'] = self.file_io.next_id(visits, "OPD", self._id_index(visits))
+            # Date and time come from one clock reading, so a visit added at
+            # midnight can't get one day's date and the next day's time
+            timestamp = datetime.now().isoformat(' ', 'seconds')
+            visit_data['visit_date'] = timestamp[:10]
+            visit_data['visit_time'] = timestamp[11:]
+            visits.append(visit_data)
+            if not self._save_visits(visits):
+                return False
+            
+            # Keep the indexes in step instead of rebuilding them on next lookup
+            self._search_blobs = None
+            self._waiting_queues.pop(visit_data['visit_date'], None)
+            if self._by_id is not None:
+                self._by_id[visit_data['id']] = visit_data
+            if self._by_date is not None:
+                self._by_date[visit_data['visit_date']].append(visit_data)
+            if self._by_patient is not None:
+                self._by_patient[visit_data.get('patient_id')].append(visit_data)
+            if self._by_status_date is not None:
+                self._by_status_date[(visit_data.get('status', ''), visit_data['visit_date'])].append(visit_data)
+            return True
     
     def update_visit(self, visit_id: str, updated_data: Dict[str, Any]) -> bool:
         """Update existing visit"""
-        visits = self.get_all_visits()
-        for i, visit in enumerate(visits):
-            if visit['id'] == visit_id:
-                visits[i].update(updated_data)
-                return self.file_io.save_data(self.filename, visits)
-        return False
+        with self._lock:
+            visits = self.get_all_visits()
+            visit = self._id_index(visits).get(visit_id)
+            if visit is None:
+                return False
+            
+            visit.update(updated_data)
+            self._search_blobs = None
+            self._waiting_queues = {}
+            self.cache_version += 1
+            if 'visit_date' in updated_data:
+                self._by_date = None
+            if 'patient_id' in updated_data or 'visit_date' in updated_data or 'visit_time' in updated_data:
+                self._by_patient = None
+            if 'status' in updated_data or 'visit_date' in updated_data:
+                self._by_status_date = None
+            return self._save_visits(visits)
+    
+    def delete_visit(self, visit_id: str, defer: bool = False) -> bool:
+        """Delete OPD visit, optionally leaving the write to a later flush()"""
+        with self._lock:
+            visits = self.get_all_visits()
+            by_id = self._id_index(visits)
+            if len(by_id) == len(visits):
+                # IDs are unique, so the index holds every visit in file order
+                by_id.pop(visit_id, None)
+                visits = list(by_id.values())
+            else:
+                visits = [v for v in visits if v.get('id') != visit_id]
+                by_id = None
+            
+            self._reset_indexes()
+            self._by_id = by_id
+            if defer:
+                self._visits_cache = visits
+                self._dirty = True
+                return True
+            return self._save_visits(visits)
+    
+    def flush(self) -> bool:
+        """Write deferred changes to disk"""
+        with self._lock:
+            if not self._dirty:
+                return True
+            return self._save_visits(self._visits_cache)
+    
+    def get_visit_by_id(self, visit_id: str) -> Optional[Dict[str, Any]]:
+        """Get visit by ID"""
+        with self._lock:
+            return self._id_index(self.get_all_visits()).get(visit_id)
+    
+    def _visit_search_blobs(self, visits: List[Dict[str, Any]]) -> List[str]:
+        """Casefolded search text per cached visit, in visit order"""
+        with self._lock:
+            if self._search_blobs is None:
+                # NUL separators keep a query from matching across two fields
+                self._search_blobs = [
+                    f"{v.get('patient_name', '')}\0{v.get('doctor_name', '')}\0{v.get('id', '')}".casefold()
+                    for v in visits
+                ]
+            return self._search_blobs
+    
+    def search_visits(self, query: str, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Search visits by patient name, doctor name, or visit ID, optionally with a status"""
+        with self._lock:
+            visits = self.get_all_visits()
+            blobs = self._visit_search_blobs(visits)
+            query = query.casefold()
+            if status is None:
+                return [visit for visit, blob in zip(visits, blobs) if query in blob]
+            # The status comparison is cheaper, so it rules rows out first
+            return [visit for visit, blob in zip(visits, blobs)
+                    if visit.get('status', '') == status and query in blob]
     
     def get_visits_by_patient(self, patient_id: str) -> List[Dict[str, Any]]:
-        """Get visits for specific patient"""
-        visits = self.get_all_visits()
-        return [v for v in visits if v.get('patient_id') == patient_id]
+        """Get visits for specific patient, oldest first"""
+        with self._lock:
+            visits = self.get_all_visits()
+            if self._by_patient is None:
+                by_patient = defaultdict(list)
+                for visit in visits:
+                    by_patient[visit.get('patient_id')].append(visit)
+                # add_visit stamps new visits with the current time, so appending keeps these sorted
+                for patient_visits in by_patient.values():
+                    patient_visits.sort(key=lambda v: (v.get('visit_date', ''), v.get('visit_time', '')))
+                self._by_patient = by_patient
+            # Callers may reorder the result, so hand out a copy of the index list
+            return list(self._by_patient.get(patient_id, []))
+    
+    def get_visits_by_date(self, date: str) -> List[Dict[str, Any]]:
+        """Get visits for specific date"""
+        with self._lock:
+            visits = self.get_all_visits()
+            if self._by_date is None:
+                by_date = defaultdict(list)
+                for visit in visits:
+                    by_date[visit.get('visit_date', '')].append(visit)
+                self._by_date = by_date
+            # A copy, so callers can't change or hold on to the index
+            return list(self._by_date.get(date, ()))
+    
+    def _status_date_index(self) -> Dict[tuple, List[Dict[str, Any]]]:
+        """Map (status, visit date) to visits over the cached visits"""
+        with self._lock:
+            visits = self.get_all_visits()
+            if self._by_status_date is None:
+                by_status_date = defaultdict(list)
+                for visit in visits:
+                    by_status_date[(visit.get('status', ''), visit.get('visit_date', ''))].append(visit)
+                self._by_status_date = by_status_date
+            return self._by_status_date
+    
+    def get_visits_by_status(self, status: str, date: str) -> List[Dict[str, Any]]:
+        """Get visits with a specific status on a specific date"""
+        with self._lock:
+            return list(self._status_date_index().get((status, date), ()))
+    
+    def get_status_counts(self, date: str) -> Dict[str, int]:
+        """Count visits per status on a specific date"""
+        with self._lock:
+            return {status: len(visits) for (status, visit_date), visits
+                    in self._status_date_index().items() if visit_date == date}
+    
+    def get_waiting_queue(self, date: str) -> List[Dict[str, Any]]:
+        """Waiting visits on a date in queue order, re-sorted only after changes"""
+        with self._lock:
+            # Looking up the visits first picks up any reload from disk
+            waiting = self._status_date_index().get(('Waiting', date), ())
+            queue = self._waiting_queues.get(date)
+            if queue is None:
+                queue = sorted(waiting, key=lambda v: (
+                    _PRIORITY_RANK.get(v.get('priority', 'Normal'), 3), v.get('visit_time', '')))
+                self._waiting_queues[date] = queue
+            return list(queue)
     
     def get_todays_visits(self) -> List[Dict[str, Any]]:
         """Get today's visits"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        visits = self.get_all_visits()
-        return [v for v in visits if v.get('visit_date') == today]
+        today = datetime.now().date().isoformat()
+        return self.get_visits_by_date(today)
@@ -3,29 +3,123 @@ PDF Generator for Hospital Management System
 Generates patient reports and medical summaries with QR codes
 """
 
+import io
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, LongTable, TableStyle, Image
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-from utils.qr_generator import QRGenerator
-from utils.file_io import PatientManager, AppointmentManager, OPDManager
+from utils.file_io import FileIOManager, PatientManager, AppointmentManager, OPDManager
+
+_STYLES = getSampleStyleSheet()
+
+def _trunc(text, limit):
+    """Shorten text longer than limit characters, marking the cut with an ellipsis"""
+    return text if len(text) <= limit else text[:limit] + '...'
+
+# Paragraph and table styles shared by every report; setStyle copies the
+# table commands, so one TableStyle can serve many tables
+_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=20,
+    spaceAfter=30,
+    alignment=TA_CENTER,
+    textColor=colors.darkblue
+)
+
+_LIST_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=18,
+    spaceAfter=30,
+    alignment=TA_CENTER,
+    textColor=colors.darkblue
+)
+
+_HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=_STYLES['Heading2'],
+    fontSize=14,
+    spaceAfter=12,
+    textColor=colors.darkblue
+)
+
+_FOOTER_STYLE = ParagraphStyle(
+    'Footer',
+    parent=_STYLES['Normal'],
+    fontSize=8,
+    alignment=TA_CENTER,
+    textColor=colors.grey
+)
+
+_PATIENT_INFO_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+def _grid_table_style(font_size):
+    """Gridded table with a grey header row"""
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), font_size),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+# Appointment and visit history tables in the patient summary
+_HISTORY_TABLE_STYLE = _grid_table_style(9)
+
+# Appointment list and OPD report tables
+_LIST_TABLE_STYLE = _grid_table_style(8)
+
+# Generator owned by a batch worker process, so its managers' file cache
+# carries over between the summaries that process renders
+_worker_generator = None
+
+def _init_batch_worker():
+    """Create the generator a batch worker process renders with"""
+    global _worker_generator
+    _worker_generator = PDFGenerator()
+
+def _render_batch_summary(patient_id: str) -> str:
+    """Render one patient summary in a batch worker process, leaving the Drive upload to the parent"""
+    return _worker_generator.generate_patient_summary(patient_id, share_to_drive=False)
 
 class PDFGenerator:
     def __init__(self):
-        self.qr_generator = QRGenerator()
-        self.patient_manager = PatientManager()
-        self.appointment_manager = AppointmentManager()
-        self.opd_manager = OPDManager()
+        self._qr_generator = None
+        file_io = FileIOManager()
+        self.patient_manager = PatientManager(file_io)
+        self.appointment_manager = AppointmentManager(file_io)
+        self.opd_manager = OPDManager(file_io)
         self.output_dir = "generated_pdfs"
         os.makedirs(self.output_dir, exist_ok=True)
     
-    def generate_patient_summary(self, patient_id: str) -> str:
-        """Generate comprehensive patient summary PDF with QR code"""
+    @property
+    def qr_generator(self):
+        """QR generator, created when a report first needs a QR code"""
+        # Imported here so list reports don't load the QR and Drive libraries
+        if self._qr_generator is None:
+            from utils.qr_generator import get_qr_generator
+            self._qr_generator = get_qr_generator()
+        return self._qr_generator
+    
+    def generate_patient_summary(self, patient_id: str, share_to_drive: bool = True) -> str:
+        """Generate comprehensive patient summary PDF with QR code, optionally uploading it to Drive"""
         try:
             # Get patient data
             patient = self.patient_manager.get_patient_by_id(patient_id)
@@ -43,38 +137,21 @@ class PDFGenerator:
             
             # Generate QR code for the PDF
             qr_data = f"Patient ID: {patient_id}\nGenerated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\nFile: {filepath}"
-            qr_path = self.qr_generator.generate_qr_code(qr_data, f"patient_{patient_id}_qr.png")
+            # The QR image is embedded straight from memory rather than through a file;
+            # printed copies are scanned, so use the best-scanning mask
+            qr_png = self.qr_generator.generate_qr_bytes(qr_data, fast_mask=False)
             
             # Create PDF document
             doc = SimpleDocTemplate(filepath, pagesize=A4, topMargin=0.5*inch)
             story = []
-            styles = getSampleStyleSheet()
-            
-            # Custom styles
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=20,
-                spaceAfter=30,
-                alignment=TA_CENTER,
-                textColor=colors.darkblue
-            )
-            
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading2'],
-                fontSize=14,
-                spaceAfter=12,
-                textColor=colors.darkblue
-            )
             
             # Title and Hospital Info
-            story.append(Paragraph("HOSPITAL MANAGEMENT SYSTEM", title_style))
-            story.append(Paragraph("Patient Summary Report", styles['Heading2']))
+            story.append(Paragraph("HOSPITAL MANAGEMENT SYSTEM", _TITLE_STYLE))
+            story.append(Paragraph("Patient Summary Report", _STYLES['Heading2']))
             story.append(Spacer(1, 20))
             
             # Patient Information Section
-            story.append(Paragraph("PATIENT INFORMATION", heading_style))
+            story.append(Paragraph("PATIENT INFORMATION", _HEADING_STYLE))
             patient_data = [
                 ['Patient ID:', patient.get('id', 'N/A')],
                 ['Name:', patient.get('name', 'N/A')],
@@ -87,103 +164,75 @@ class PDFGenerator:
             ]
             
             patient_table = Table(patient_data, colWidths=[2*inch, 4*inch])
-            patient_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
+            patient_table.setStyle(_PATIENT_INFO_TABLE_STYLE)
             
             story.append(patient_table)
             story.append(Spacer(1, 20))
             
             # Appointments Section
-            story.append(Paragraph("APPOINTMENT HISTORY", heading_style))
+            story.append(Paragraph("APPOINTMENT HISTORY", _HEADING_STYLE))
             if appointments:
-                apt_data = [['Date', 'Time', 'Doctor', 'Status', 'Notes']]
-                for apt in appointments:
-                    apt_data.append([
+                apt_data = [['Date', 'Time', 'Doctor', 'Status', 'Notes']] + [
+                    [
                         apt.get('appointment_date', 'N/A'),
                         apt.get('appointment_time', 'N/A'),
                         apt.get('doctor_name', 'N/A'),
                         apt.get('status', 'N/A'),
-                        apt.get('notes', 'N/A')[:50] + '...' if len(apt.get('notes', '')) > 50 else apt.get('notes', 'N/A')
-                    ])
+                        _trunc(apt.get('notes', 'N/A'), 50)
+                    ]
+                    for apt in appointments
+                ]
                 
                 apt_table = Table(apt_data, colWidths=[1.2*inch, 0.8*inch, 1.5*inch, 1*inch, 2*inch])
-                apt_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 9),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
+                apt_table.setStyle(_HISTORY_TABLE_STYLE)
                 story.append(apt_table)
             else:
-                story.append(Paragraph("No appointment history found.", styles['Normal']))
+                story.append(Paragraph("No appointment history found.", _STYLES['Normal']))
             
             story.append(Spacer(1, 20))
             
             # OPD Visits Section
-            story.append(Paragraph("OPD VISIT HISTORY", heading_style))
+            story.append(Paragraph("OPD VISIT HISTORY", _HEADING_STYLE))
             if opd_visits:
-                opd_data = [['Visit Date', 'Time', 'Chief Complaint', 'Diagnosis', 'Treatment']]
-                for visit in opd_visits:
-                    opd_data.append([
+                opd_data = [['Visit Date', 'Time', 'Chief Complaint', 'Diagnosis', 'Treatment']] + [
+                    [
                         visit.get('visit_date', 'N/A'),
                         visit.get('visit_time', 'N/A'),
-                        visit.get('chief_complaint', 'N/A')[:30] + '...' if len(visit.get('chief_complaint', '')) > 30 else visit.get('chief_complaint', 'N/A'),
-                        visit.get('diagnosis', 'N/A')[:30] + '...' if len(visit.get('diagnosis', '')) > 30 else visit.get('diagnosis', 'N/A'),
-                        visit.get('treatment', 'N/A')[:30] + '...' if len(visit.get('treatment', '')) > 30 else visit.get('treatment', 'N/A')
-                    ])
+                        _trunc(visit.get('chief_complaint', 'N/A'), 30),
+                        _trunc(visit.get('diagnosis', 'N/A'), 30),
+                        _trunc(visit.get('treatment', 'N/A'), 30)
+                    ]
+                    for visit in opd_visits
+                ]
                 
                 opd_table = Table(opd_data, colWidths=[1*inch, 0.8*inch, 1.8*inch, 1.8*inch, 1.8*inch])
-                opd_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 9),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
+                opd_table.setStyle(_HISTORY_TABLE_STYLE)
                 story.append(opd_table)
             else:
-                story.append(Paragraph("No OPD visit history found.", styles['Normal']))
+                story.append(Paragraph("No OPD visit history found.", _STYLES['Normal']))
             
             story.append(Spacer(1, 30))
             
             # QR Code Section
-            story.append(Paragraph("DOCUMENT VERIFICATION", heading_style))
-            if os.path.exists(qr_path):
-                qr_image = Image(qr_path, width=2*inch, height=2*inch)
+            story.append(Paragraph("DOCUMENT VERIFICATION", _HEADING_STYLE))
+            if qr_png:
+                qr_image = Image(io.BytesIO(qr_png), width=2*inch, height=2*inch)
                 story.append(qr_image)
-                story.append(Paragraph("Scan QR code for document verification", styles['Normal']))
+                story.append(Paragraph("Scan QR code for document verification", _STYLES['Normal']))
             
             # Footer
             story.append(Spacer(1, 20))
-            footer_style = ParagraphStyle(
-                'Footer',
-                parent=styles['Normal'],
-                fontSize=8,
-                alignment=TA_CENTER,
-                textColor=colors.grey
-            )
-            story.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", footer_style))
-            story.append(Paragraph("This is a computer-generated document.", footer_style))
+            story.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", _FOOTER_STYLE))
+            story.append(Paragraph("This is a computer-generated document.", _FOOTER_STYLE))
             
             # Build PDF
             doc.build(story)
-            self.qr_generator.generate_pdf_drive_qr(
-            pdf_path=filepath,
-            person_name=patient.get("name", "Unknown"),
-            patient_id=patient_id
-)
+            if share_to_drive:
+                self.qr_generator.generate_pdf_drive_qr(
+                    pdf_path=filepath,
+                    person_name=patient.get("name", "Unknown"),
+                    patient_id=patient_id
+                )
 
             
             return filepath
@@ -191,6 +240,32 @@ class PDFGenerator:
         except Exception as e:
             raise Exception(f"Error generating patient summary PDF: {str(e)}")
     
+    def generate_patient_summaries_batch(self, patient_ids: List[str]) -> Dict[str, Optional[str]]:
+        """Generate summary PDFs for several patients in parallel, returning each patient's file path, None if it failed"""
+        if not patient_ids:
+            return {}
+        workers = min(len(patient_ids), os.cpu_count() or 1)
+        filepaths = {}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker) as executor:
+            futures = {patient_id: executor.submit(_render_batch_summary, patient_id) for patient_id in patient_ids}
+            # One failed summary doesn't cost the others theirs
+            for patient_id, future in futures.items():
+                try:
+                    filepaths[patient_id] = future.result()
+                except Exception as e:
+                    print(f"Error generating summary for {patient_id}: {e}")
+                    filepaths[patient_id] = None
+        
+        # Workers only render; Drive is authenticated once, here, and the
+        # uploads share their permission grants in batched requests
+        rendered = [
+            (filepath, (self.patient_manager.get_patient_by_id(patient_id) or {}).get("name", "Unknown"), patient_id)
+            for patient_id, filepath in filepaths.items() if filepath
+        ]
+        if rendered:
+            self.qr_generator.generate_pdf_drive_qr_batch(rendered)
+        return filepaths
+    
     def generate_appointment_list(self, date: str = None) -> str:
         """Generate appointment list PDF for specific date or all appointments"""
         try:
@@ -210,62 +285,37 @@ class PDFGenerator:
             # Create PDF document
             doc = SimpleDocTemplate(filepath, pagesize=A4, topMargin=0.5*inch)
             story = []
-            styles = getSampleStyleSheet()
             
             # Title
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=18,
-                spaceAfter=30,
-                alignment=TA_CENTER,
-                textColor=colors.darkblue
-            )
-            
-            story.append(Paragraph(f"APPOINTMENT LIST{title_suffix}", title_style))
+            story.append(Paragraph(f"APPOINTMENT LIST{title_suffix}", _LIST_TITLE_STYLE))
             story.append(Spacer(1, 20))
             
             # Appointments table
             if appointments:
-                apt_data = [['ID', 'Patient ID', 'Patient Name', 'Date', 'Time', 'Doctor', 'Status']]
-                for apt in appointments:
-                    patient = self.patient_manager.get_patient_by_id(apt.get('patient_id', ''))
-                    patient_name = patient.get('name', 'Unknown') if patient else 'Unknown'
-                    
-                    apt_data.append([
+                # Resolve every row's patient name from one pass over the patients
+                patient_names = {p['id']: p.get('name', 'Unknown') for p in self.patient_manager.get_all_patients()}
+                apt_data = [['ID', 'Patient ID', 'Patient Name', 'Date', 'Time', 'Doctor', 'Status']] + [
+                    [
                         apt.get('id', 'N/A'),
                         apt.get('patient_id', 'N/A'),
-                        patient_name,
+                        patient_names.get(apt.get('patient_id', ''), 'Unknown'),
                         apt.get('appointment_date', 'N/A'),
                         apt.get('appointment_time', 'N/A'),
                         apt.get('doctor_name', 'N/A'),
                         apt.get('status', 'N/A')
-                    ])
+                    ]
+                    for apt in appointments
+                ]
                 
-                apt_table = Table(apt_data, colWidths=[0.8*inch, 1*inch, 1.5*inch, 1*inch, 0.8*inch, 1.2*inch, 0.8*inch])
-                apt_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 8),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
+                apt_table = LongTable(apt_data, colWidths=[0.8*inch, 1*inch, 1.5*inch, 1*inch, 0.8*inch, 1.2*inch, 0.8*inch], repeatRows=1)
+                apt_table.setStyle(_LIST_TABLE_STYLE)
                 story.append(apt_table)
             else:
-                story.append(Paragraph("No appointments found.", styles['Normal']))
+                story.append(Paragraph("No appointments found.", _STYLES['Normal']))
             
             # Footer
             story.append(Spacer(1, 30))
-            footer_style = ParagraphStyle(
-                'Footer',
-                parent=styles['Normal'],
-                fontSize=8,
-                alignment=TA_CENTER,
-                textColor=colors.grey
-            )
-            story.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", footer_style))
+            story.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", _FOOTER_STYLE))
             
             # Build PDF
             doc.build(story)
@@ -280,7 +330,7 @@ class PDFGenerator:
         try:
             # Get visits
             if date:
-                visits = [v for v in self.opd_manager.get_all_visits() if v.get('visit_date') == date]
+                visits = self.opd_manager.get_visits_by_date(date)
                 title_suffix = f" for {date}"
             else:
                 visits = self.opd_manager.get_all_visits()
@@ -294,62 +344,37 @@ class PDFGenerator:
             # Create PDF document
             doc = SimpleDocTemplate(filepath, pagesize=A4, topMargin=0.5*inch)
             story = []
-            styles = getSampleStyleSheet()
             
             # Title
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=18,
-                spaceAfter=30,
-                alignment=TA_CENTER,
-                textColor=colors.darkblue
-            )
-            
-            story.append(Paragraph(f"OPD REPORT{title_suffix}", title_style))
+            story.append(Paragraph(f"OPD REPORT{title_suffix}", _LIST_TITLE_STYLE))
             story.append(Spacer(1, 20))
             
             # Visits table
             if visits:
-                visit_data = [['ID', 'Patient ID', 'Patient Name', 'Date', 'Time', 'Chief Complaint', 'Status']]
-                for visit in visits:
-                    patient = self.patient_manager.get_patient_by_id(visit.get('patient_id', ''))
-                    patient_name = patient.get('name', 'Unknown') if patient else 'Unknown'
-                    
-                    visit_data.append([
+                # Resolve every row's patient name from one pass over the patients
+                patient_names = {p['id']: p.get('name', 'Unknown') for p in self.patient_manager.get_all_patients()}
+                visit_data = [['ID', 'Patient ID', 'Patient Name', 'Date', 'Time', 'Chief Complaint', 'Status']] + [
+                    [
                         visit.get('id', 'N/A'),
                         visit.get('patient_id', 'N/A'),
-                        patient_name,
+                        patient_names.get(visit.get('patient_id', ''), 'Unknown'),
                         visit.get('visit_date', 'N/A'),
                         visit.get('visit_time', 'N/A'),
-                        visit.get('chief_complaint', 'N/A')[:30] + '...' if len(visit.get('chief_complaint', '')) > 30 else visit.get('chief_complaint', 'N/A'),
+                        _trunc(visit.get('chief_complaint', 'N/A'), 30),
                         visit.get('status', 'N/A')
-                    ])
+                    ]
+                    for visit in visits
+                ]
                 
-                visit_table = Table(visit_data, colWidths=[0.8*inch, 1*inch, 1.3*inch, 0.9*inch, 0.7*inch, 1.8*inch, 0.8*inch])
-                visit_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 8),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
+                visit_table = LongTable(visit_data, colWidths=[0.8*inch, 1*inch, 1.3*inch, 0.9*inch, 0.7*inch, 1.8*inch, 0.8*inch], repeatRows=1)
+                visit_table.setStyle(_LIST_TABLE_STYLE)
                 story.append(visit_table)
             else:
-                story.append(Paragraph("No OPD visits found.", styles['Normal']))
+                story.append(Paragraph("No OPD visits found.", _STYLES['Normal']))
             
             # Footer
             story.append(Spacer(1, 30))
-            footer_style = ParagraphStyle(
-                'Footer',
-                parent=styles['Normal'],
-                fontSize=8,
-                alignment=TA_CENTER,
-                textColor=colors.grey
-            )
-            story.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", footer_style))
+            story.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", _FOOTER_STYLE))
             
             # Build PDF
             doc.build(story)
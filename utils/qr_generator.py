@@ -3,79 +3,230 @@ QR Code Generator for Hospital Management System
 Now includes Google Drive upload and dynamic QR code generation
 """
 
+import io
 import os
-import pickle
-import qrcode
-from PIL import Image
-from typing import Optional
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from google_auth_oauthlib.flow import InstalledAppFlow
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
+from typing import List, Optional, Tuple
+
+# segno encodes far faster than qrcode; the qrcode package is used when
+# segno isn't installed, with PNGs written directly instead of through PIL
+try:
+    import segno
+except ImportError:
+    segno = None
+    import qrcode
+
+if segno is not None:
+    @lru_cache(maxsize=512)
+    def _encoded_qr(data: str, fast_mask: bool):
+        """QR code for data, reused when the same data is encoded again"""
+        # A fixed mask skips scoring all eight masks, which is most of the encoding time
+        return segno.make_qr(data, error='l', boost_error=False, mask=0 if fast_mask else None)
+    
+    def _qr_png(data: str, size: int, border: int, fast_mask: bool) -> bytes:
+        """PNG image of the QR code for data"""
+        buffer = io.BytesIO()
+        _encoded_qr(data, fast_mask).save(buffer, kind="png", scale=size, border=border, dark="black", light="white")
+        return buffer.getvalue()
+else:
+    # One QRCode per thread, cleared between encodings instead of rebuilt
+    _qr_local = threading.local()
+    
+    @lru_cache(maxsize=512)
+    def _encoded_qr(data: str, fast_mask: bool):
+        """Side length and rows, packed 8 modules per byte, of the QR matrix for data; reused for repeated data"""
+        qr = getattr(_qr_local, 'qr', None)
+        if qr is None:
+            qr = _qr_local.qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_L, border=0)
+        qr.clear()
+        # make(fit=True) grows the version, so start each encoding from the smallest again
+        qr.version = 1
+        # A fixed mask skips scoring all eight masks, which is most of the encoding time
+        qr.mask_pattern = 0 if fast_mask else None
+        # The payloads are short, so one segment costs little and skips the mode-splitting search
+        qr.add_data(data, optimize=0)
+        qr.make(fit=True)
+        count = qr.modules_count
+        row_bytes = (count + 7) // 8
+        packed_rows = tuple(
+            int("".join("1" if module else "0" for module in row).ljust(row_bytes * 8, "0"), 2).to_bytes(row_bytes, "big")
+            for row in qr.modules
+        )
+        return count, packed_rows
+    
+    def _qr_png(data: str, size: int, border: int, fast_mask: bool) -> bytes:
+        """PNG image of the QR code for data"""
+        count, packed_rows = _encoded_qr(data, fast_mask)
+        return _png(count, packed_rows, size, border)
+
+def _png_chunk(kind: bytes, payload: bytes) -> bytes:
+    """One length-prefixed, CRC-checked PNG chunk"""
+    return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", zlib.crc32(kind + payload))
+
+@lru_cache(maxsize=8)
+def _expansion_table(size: int) -> List[str]:
+    """Pixel bits for each possible byte of packed modules, most significant bit first"""
+    # In a 1-bit greyscale PNG 0 is black, so dark modules become 0 bits
+    dark = "0" * size
+    light = "1" * size
+    return ["".join(dark if byte >> (7 - bit) & 1 else light for bit in range(8)) for byte in range(256)]
+
+def _png(count: int, packed_rows, size: int, border: int) -> bytes:
+    """A packed module matrix as a 1-bit greyscale PNG, size pixels per module, black on white"""
+    expand = _expansion_table(size).__getitem__
+    quiet = "1" * (border * size)
+    matrix_width = count * size
+    width = matrix_width + 2 * len(quiet)
+    row_bytes = (width + 7) // 8
+    # Each scanline is filter type 0 (none) followed by its pixels, 8 to a byte
+    blank_scanline = b"\x00" + b"\xff" * row_bytes
+    scanlines = [blank_scanline * (border * size)]
+    for packed in packed_rows:
+        # A table lookup per 8 modules; the slice drops the padding bits of the last byte
+        bits = quiet + "".join(map(expand, packed))[:matrix_width] + quiet
+        pixels = int(bits.ljust(row_bytes * 8, "1"), 2).to_bytes(row_bytes, "big")
+        scanlines.append((b"\x00" + pixels) * size)
+    scanlines.append(blank_scanline * (border * size))
+    # Runs of identical pixels compress well even at the fastest level
+    idat = zlib.compress(b"".join(scanlines), 1)
+    return b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, width, 1, 0, 0, 0, 0)),
+        _png_chunk(b"IDAT", idat),
+        _png_chunk(b"IEND", b""),
+    ))
+
+# PDFs at least this large are uploaded in a resumable session
+_RESUMABLE_UPLOAD_MIN_SIZE = 5 * 1024 * 1024
+
+# Permission that lets anyone with the link download an uploaded PDF
+_PUBLIC_READ = {'role': 'reader', 'type': 'anyone'}
+
+# Direct download link for a Drive file ID
+_DRIVE_DOWNLOAD_URL = "https://drive.google.com/uc?id={}&export=download"
+
+# Most calls Drive accepts in one batch request
+_DRIVE_BATCH_SIZE = 100
+
+def _drive_qr_filename(person_name: str, patient_id: str) -> str:
+    """QR image name for a patient's Drive link, Person_Name_PATID.png"""
+    return f"{person_name.replace(' ', '_')}_{patient_id}.png"
 
 class QRGenerator:
     def __init__(self):
         self.qr_dir = os.path.join("generated_pdfs", "qr_codes")
         os.makedirs(self.qr_dir, exist_ok=True)
         self.scopes = ['https://www.googleapis.com/auth/drive']
-        self.service = self.authenticate_drive()
+        # Drive download links by (PDF path, mtime, size), so an unchanged PDF isn't uploaded twice
+        self._drive_links = {}
+
+    @cached_property
+    def service(self):
+        """Drive service, authenticated on first use so QR-only callers never touch Drive"""
+        return self.authenticate_drive()
 
     def authenticate_drive(self):
         """Authenticate with Google Drive and return service object"""
+        # The Google client libraries are only loaded when Drive is used
+        from googleapiclient.discovery import build
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from google.oauth2.credentials import Credentials
+
         creds = None
-        if os.path.exists('token.pickle'):
+        save_token = False
+        if os.path.exists('token.json'):
+            creds = Credentials.from_authorized_user_file('token.json', self.scopes)
+        elif os.path.exists('token.pickle'):
+            # Tokens saved before the switch to JSON are read once and re-saved as JSON
+            import pickle
             with open('token.pickle', 'rb') as token:
                 creds = pickle.load(token)
+            save_token = True
 
         if not creds or not creds.valid:
             flow = InstalledAppFlow.from_client_secrets_file('credentials.json', self.scopes)
             creds = flow.run_local_server(port=0)
-            with open('token.pickle', 'wb') as token:
-                pickle.dump(creds, token)
+            save_token = True
+        if save_token:
+            with open('token.json', 'w') as token:
+                token.write(creds.to_json())
 
-        return build('drive', 'v3', credentials=creds)
+        # The Drive discovery document ships with the client library, so skip the file cache lookup
+        return build('drive', 'v3', credentials=creds, cache_discovery=False)
 
     def upload_pdf_to_drive(self, filepath: str) -> Optional[str]:
         """Uploads PDF to Google Drive and returns a public download URL"""
+        file_id = self._create_drive_file(filepath)
+        if not file_id:
+            return None
+
+        self.service.permissions().create(fileId=file_id, body=_PUBLIC_READ).execute()
+        return _DRIVE_DOWNLOAD_URL.format(file_id)
+
+    def _create_drive_file(self, filepath: str) -> Optional[str]:
+        """Uploads a PDF to Google Drive and returns its file ID"""
         if not os.path.exists(filepath):
             print(f"❌ File not found: {filepath}")
             return None
 
+        from googleapiclient.http import MediaFileUpload
+
         metadata = {
             'name': os.path.basename(filepath),
             'mimeType': 'application/pdf'
         }
-        media = MediaFileUpload(filepath, mimetype='application/pdf', resumable=True)
+        # Small files go up in a single request; a resumable session costs an extra round trip
+        resumable = os.path.getsize(filepath) >= _RESUMABLE_UPLOAD_MIN_SIZE
+        media = MediaFileUpload(filepath, mimetype='application/pdf', resumable=resumable)
         file = self.service.files().create(body=metadata, media_body=media, fields='id').execute()
+        return file.get('id')
 
-        self.service.permissions().create(
-            fileId=file['id'],
-            body={'role': 'reader', 'type': 'anyone'},
-        ).execute()
-
-        file_id = file.get('id')
-        return f"https://drive.google.com/uc?id={file_id}&export=download"
-
-    def generate_qr_code(self, data: str, filename: str, size: int = 10, border: int = 4) -> str:
-        """Generates a QR code image with the given data and filename"""
+    def generate_qr_code(self, data: str, filename: str, size: int = 10, border: int = 4,
+                         fast_mask: bool = True) -> str:
+        """Generates a QR code image with the given data and filename; fast_mask=False picks the best-scanning mask"""
         try:
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=size,
-                border=border,
-            )
-            qr.add_data(data)
-            qr.make(fit=True)
-            img = qr.make_image(fill_color="black", back_color="white")
-
+            png = _qr_png(data, size, border, fast_mask)
             filepath = os.path.join(self.qr_dir, filename)
-            img.save(filepath)
+            # Write a sibling file and swap it in so readers never see a partial image;
+            # the name is unique per thread because batch threads may write the same QR
+            tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'wb') as file:
+                    file.write(png)
+                os.replace(tmp_path, filepath)
+            except OSError:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
             return filepath
 
         except Exception as e:
             print(f"❌ Failed to generate QR code: {e}")
             return ""
 
+    def generate_qr_bytes(self, data: str, size: int = 10, border: int = 4, fast_mask: bool = True) -> bytes:
+        """Generates a QR code as PNG bytes, for callers that don't need a file"""
+        try:
+            return _qr_png(data, size, border, fast_mask)
+
+        except Exception as e:
+            print(f"❌ Failed to generate QR code: {e}")
+            return b""
+
+    def generate_batch(self, items: List[Tuple[str, str]], workers: Optional[int] = None) -> List[str]:
+        """Generates QR codes for (data, filename) pairs in parallel, returning paths in the same order"""
+        if not items:
+            return []
+        workers = workers or min(len(items), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda item: self.generate_qr_code(*item), items))
+
     def generate_patient_qr(self, patient_id: str, additional_info: str = "") -> str:
         """QR with raw patient info"""
         qr_data = f"PATIENT_ID:{patient_id}"
@@ -119,25 +270,104 @@ class QRGenerator:
         Returns:
             QR code file path
         """
-        link = self.upload_pdf_to_drive(pdf_path)
-        if not link:
-            return None
+        key = self._drive_link_key(pdf_path)
+        link = self._drive_links.get(key) if key else None
+        if link is None:
+            link = self.upload_pdf_to_drive(pdf_path)
+            if not link:
+                return None
+            if key:
+                self._drive_links[key] = link
+
+        return self.generate_qr_code(link, _drive_qr_filename(person_name, patient_id))
+
+    def generate_pdf_drive_qr_batch(self, items: List[Tuple[str, str, str]]) -> List[Optional[str]]:
+        """generate_pdf_drive_qr for (pdf_path, person_name, patient_id) items, sharing all new uploads in batched requests"""
+        keys = [self._drive_link_key(pdf_path) for pdf_path, _, _ in items]
+        links = [self._drive_links.get(key) if key else None for key in keys]
+
+        # The Drive service's HTTP connection isn't thread-safe, so uploads go one at a time
+        uploaded = {}
+        for index, (pdf_path, _, _) in enumerate(items):
+            if links[index] is None:
+                try:
+                    file_id = self._create_drive_file(pdf_path)
+                except Exception as e:
+                    # Leave this item without a link and carry on with the rest
+                    print(f"❌ Failed to upload PDF {pdf_path}: {e}")
+                    continue
+                if file_id:
+                    uploaded[str(index)] = file_id
 
-        safe_name = person_name.replace(" ", "_")
-        qr_filename = f"{safe_name}_{patient_id}.png"
-        return self.generate_qr_code(link, qr_filename)
+        # Permission grants are metadata calls, which Drive accepts in batches
+        failed = set()
+
+        def on_grant(request_id, response, exception):
+            """Note uploads whose permission grant failed"""
+            if exception is not None:
+                print(f"❌ Failed to share uploaded PDF: {exception}")
+                failed.add(request_id)
+
+        pending = list(uploaded.items())
+        for start in range(0, len(pending), _DRIVE_BATCH_SIZE):
+            chunk = pending[start:start + _DRIVE_BATCH_SIZE]
+            try:
+                batch = self.service.new_batch_http_request(callback=on_grant)
+                for request_id, file_id in chunk:
+                    batch.add(self.service.permissions().create(fileId=file_id, body=_PUBLIC_READ),
+                              request_id=request_id)
+                batch.execute()
+            except Exception as e:
+                # Only this chunk's grants are lost; other chunks keep their results
+                print(f"❌ Failed to share uploaded PDFs: {e}")
+                failed.update(request_id for request_id, _ in chunk)
+
+        for request_id, file_id in uploaded.items():
+            if request_id not in failed:
+                index = int(request_id)
+                links[index] = _DRIVE_DOWNLOAD_URL.format(file_id)
+                if keys[index]:
+                    self._drive_links[keys[index]] = links[index]
+
+        qr_items = [(link, _drive_qr_filename(person_name, patient_id))
+                    for link, (_, person_name, patient_id) in zip(links, items) if link]
+        qr_paths = iter(self.generate_batch(qr_items))
+        return [next(qr_paths) if link else None for link in links]
+
+    def _drive_link_key(self, pdf_path: str) -> Optional[tuple]:
+        """Key for a PDF's cached Drive link, None if the file can't be read"""
+        try:
+            stat = os.stat(pdf_path)
+            return (pdf_path, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
 
     def cleanup_old_qr_codes(self, days_old: int = 30):
         """Deletes QR codes older than N days"""
         try:
             import time
-            now = time.time()
-            for filename in os.listdir(self.qr_dir):
-                filepath = os.path.join(self.qr_dir, filename)
-                if os.path.isfile(filepath):
-                    file_time = os.path.getmtime(filepath)
-                    if (now - file_time) > (days_old * 86400):
-                        os.remove(filepath)
-                        print(f"🗑️ Deleted old QR code: {filename}")
+            cutoff = time.time() - days_old * 86400
+            # scandir entries carry the file type, so only the mtime needs a stat call
+            with os.scandir(self.qr_dir) as entries:
+                stale = [entry.path for entry in entries
+                         if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff]
+            if not stale:
+                return
+            with ThreadPoolExecutor(max_workers=min(len(stale), 8)) as executor:
+                list(executor.map(os.remove, stale))
+            print(f"🗑️ Deleted {len(stale)} old QR code(s)")
         except Exception as e:
             print(f"⚠️ Error during cleanup: {e}")
+
+# Process-wide QRGenerator, so the Drive service is authenticated at most once
+_shared_generator = None
+_shared_generator_lock = threading.Lock()
+
+def get_qr_generator() -> QRGenerator:
+    """Shared QRGenerator, created on first call"""
+    global _shared_generator
+    if _shared_generator is None:
+        with _shared_generator_lock:
+            if _shared_generator is None:
+                _shared_generator = QRGenerator()
+    return _shared_generator